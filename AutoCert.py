@@ -1,32 +1,45 @@
 import os
 import sys
 import configparser
-from threading import Thread, Lock
-from queue import Queue
+from dataclasses import replace
+from threading import Thread
 from tkinter import Menu, NW, WORD, END
-from tkinter.filedialog import askopenfilename
+from tkinter.filedialog import askopenfilename, asksaveasfilename, askdirectory
 from tkinter.scrolledtext import ScrolledText  # Usado para a documentação e mensagem
-from PIL import Image, ImageDraw, ImageFont, ImageTk
-import pandas as pd
-import yagmail
 from tkinter import PhotoImage
 
+from autocert.fonts import FontIndex, font_dirs_from_config
+from autocert.job import CertificateJob, layout_options, sending_options
+from autocert.layout import default_fields
+from autocert.metrics import BatchMetrics, format_duration
+
 # Importa ttkbootstrap para a interface moderna
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
+# Intervalo para agrupar eventos seguidos antes de redesenhar a pré-visualização
+PREVIEW_DEBOUNCE_MS = 30
+# Rótulos da interface para o alinhamento dos campos
+ALIGN_LABELS = {'left': 'Esquerda', 'center': 'Centro', 'right': 'Direita'}
+
 class EditCertificate:
     def __init__(self):
         self.config = configparser.ConfigParser()
         self.config_path = 'config.ini'
         self.sending = False
         self.stop_requested = False
+        self.preview_after_id = None
+        self.metrics = None  # métricas do último envio, para exportar
+        self.layout_fields = ()  # campos de um layout aberto (data, curso, QR code...)
+        self.domain_checker = None  # domínios já consultados ficam em cache durante a sessão
         self.check_and_create_config()
-        self.load_font_families()
+        self.font_index = self.create_font_index()
         # Define o tema inicial ("darkly" para tema escuro e "flatly" para claro)
         self.current_theme = "darkly"
         self.create_gui()
         self.create_menu()
+        # A varredura das fontes roda em segundo plano para a janela abrir imediatamente
+        self.load_font_families()
 
     def check_and_create_config(self):
         if not os.path.exists(self.config_path):
@@ -36,19 +49,29 @@ class EditCertificate:
         else:
             self.config.read(self.config_path)
 
+    def create_font_index(self):
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(self.config_path)), 'fonts_cache.json')
+        return FontIndex(font_dirs_from_config(self.config), cache_path=cache_path)
+
     def load_font_families(self):
-        fonts_dir = "C:\\Windows\\Fonts"
-        self.font_families = {}
-        for root, dirs, files in os.walk(fonts_dir):
-            for file in files:
-                if file.lower().endswith(('.ttf', '.otf')):
-                    self.font_families[os.path.splitext(file)[0]] = file
+        def on_loaded(index):
+            families = index.families()
+            self.window.after(0, lambda: self.font_combobox.config(values=families))
+        self.font_index.load_async(on_loaded)
 
     def create_menu(self):
         # Usa o Menu nativo do tkinter para a barra de menus
         menu_bar = Menu(self.window, tearoff=0)
         # Menu Arquivo
         file_menu = Menu(menu_bar, tearoff=0)
+        file_menu.add_command(label="Abrir Layout...", command=self.open_layout)
+        file_menu.add_command(label="Salvar Layout...", command=self.save_layout)
+        file_menu.add_command(label="Validar Planilha...", command=self.validate_spreadsheet)
+        file_menu.add_command(label="Exportar PDF para Impressão...", command=self.export_print_pdf)
+        file_menu.add_command(label="Exportar Certificados (ZIP)...", command=lambda: self.export_certificates(True))
+        file_menu.add_command(label="Exportar Certificados para Pasta...",
+                              command=lambda: self.export_certificates(False))
+        file_menu.add_command(label="Exportar Métricas do Envio...", command=self.export_metrics)
         file_menu.add_command(label="Sair", command=self.window.quit)
         menu_bar.add_cascade(label="📁 Arquivo", menu=file_menu)
         # Menu Ajuda
@@ -146,6 +169,7 @@ class EditCertificate:
         preview_container = ttk.Frame(main_frame)
         preview_container.pack(side="left", fill="both", expand=True)
         self.preview_canvas = self.create_preview_canvas(preview_container)
+        self.preview_renderer = None  # criado na primeira pré-visualização (carrega o Pillow)
 
         # Área inferior: barra de progresso, status e botões de ação
         bottom = ttk.Frame(self.window)
@@ -162,6 +186,8 @@ class EditCertificate:
         self.stop_button.pack(side="right", padx=5)
         self.send_button = ttk.Button(button_frame, text="📧 Enviar Certificados", command=self.start_sending, bootstyle=SUCCESS)
         self.send_button.pack(side="right", padx=5)
+        self.resume_button = ttk.Button(button_frame, text="🔁 Retomar Envio", command=lambda: self.start_sending(resume=True), bootstyle=(SUCCESS, OUTLINE))
+        self.resume_button.pack(side="right", padx=5)
 
         # Cria o conteúdo dos _tabs_
         self.create_config_tab(self.tab_config)
@@ -228,6 +254,9 @@ class EditCertificate:
         self.content_text = ScrolledText(data_frame, height=6, wrap=WORD, font=("Segoe UI", 10))
         self.content_text.insert(END, 'Prezado {name},\n\nSegue seu certificado em anexo.\n\nAtenciosamente,\nEquipe ...')
         self.content_text.grid(row=3, column=1, sticky="ew", padx=5, pady=5)
+        ttk.Label(data_frame, text="Arquivar PDFs:", font=("Segoe UI", 10)).grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.archive_button = ttk.Button(data_frame, text="Não arquivar", command=self.select_archive_dir, bootstyle=SECONDARY)
+        self.archive_button.grid(row=4, column=1, sticky="ew", padx=5, pady=5)
         data_frame.columnconfigure(1, weight=1)
 
     def create_design_tab(self, parent):
@@ -248,12 +277,26 @@ class EditCertificate:
         self.cert_y_entry = ttk.Entry(pos_frame, width=8, font=("Segoe UI", 10))
         self.cert_y_entry.insert(0, '1930')
         self.cert_y_entry.grid(row=1, column=2, sticky="w", padx=5, pady=5)
+        ttk.Label(pos_frame, text="Alinhar Nome:", font=("Segoe UI", 10)).grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        self.name_align_combobox = ttk.Combobox(pos_frame, values=list(ALIGN_LABELS.values()), width=10,
+                                                state="readonly", font=("Segoe UI", 10))
+        self.name_align_combobox.set(ALIGN_LABELS['left'])
+        self.name_align_combobox.grid(row=2, column=1, columnspan=2, sticky="w", padx=5, pady=5)
+        ttk.Label(pos_frame, text="Largura Máx. Nome:", font=("Segoe UI", 10)).grid(row=3, column=0, sticky="w", padx=5, pady=5)
+        # 0: sem limite; acima disso a fonte do nome diminui até o nome caber
+        self.name_max_width_entry = ttk.Entry(pos_frame, width=8, font=("Segoe UI", 10))
+        self.name_max_width_entry.insert(0, '0')
+        self.name_max_width_entry.grid(row=3, column=1, sticky="w", padx=5, pady=5)
+        ttk.Label(pos_frame, text="Cor do Nome:", font=("Segoe UI", 10)).grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.name_color_entry = ttk.Entry(pos_frame, width=8, font=("Segoe UI", 10))
+        self.name_color_entry.insert(0, '#000000')
+        self.name_color_entry.grid(row=4, column=1, sticky="w", padx=5, pady=5)
 
         # --- Configurações de Fonte ---
         font_frame = ttk.Labelframe(parent, text="🔠 Configurações de Fonte", padding=10)
         font_frame.pack(fill="x", padx=10, pady=5)
         ttk.Label(font_frame, text="Fonte Principal:", font=("Segoe UI", 10)).grid(row=0, column=0, sticky="w", padx=5, pady=5)
-        self.font_combobox = ttk.Combobox(font_frame, values=list(self.font_families.keys()), font=("Segoe UI", 10))
+        self.font_combobox = ttk.Combobox(font_frame, values=[], font=("Segoe UI", 10))
         self.font_combobox.set('times')
         self.font_combobox.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
         ttk.Label(font_frame, text="Tamanho Texto:", font=("Segoe UI", 10)).grid(row=1, column=0, sticky="w", padx=5, pady=5)
@@ -273,9 +316,11 @@ class EditCertificate:
 
         # Atualiza a pré-visualização em tempo real ao alterar os parâmetros
         for widget in (self.x_entry, self.y_entry, self.cert_x_entry, self.cert_y_entry,
-                       self.font_combobox, self.font_size_entry, self.font_cert_size_entry):
+                       self.font_combobox, self.font_size_entry, self.font_cert_size_entry,
+                       self.name_max_width_entry, self.name_color_entry):
             widget.bind("<KeyRelease>", lambda e: self.preview_certificate())
         self.font_combobox.bind("<<ComboboxSelected>>", lambda e: self.preview_certificate())
+        self.name_align_combobox.bind("<<ComboboxSelected>>", lambda e: self.preview_certificate())
 
     def select_template(self):
         self.template_path = askopenfilename(
@@ -287,57 +332,279 @@ class EditCertificate:
             self.preview_certificate()
 
     def preview_certificate(self):
+        # Agrupa rajadas de eventos (digitação, redimensionamento) em uma única atualização
+        if self.preview_after_id is not None:
+            self.window.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.window.after(PREVIEW_DEBOUNCE_MS, self.request_preview)
+
+    def request_preview(self):
+        self.preview_after_id = None
         try:
-            if not hasattr(self, 'template_path') or not self.template_path:
-                raise ValueError("Selecione um modelo de certificado!")
-            name = "Pré-visualização"
-            certificate_number = "0000"
-            certificate_number_padded = certificate_number.zfill(4)
-            preview_image = Image.open(self.template_path)
-            draw = ImageDraw.Draw(preview_image)
-            font_name = self.font_combobox.get()
-            font_size = int(self.font_size_entry.get())
-            font_path = self.get_font_path(font_name)
-            font = ImageFont.truetype(font_path, font_size)
-            x = int(self.x_entry.get())
-            y = int(self.y_entry.get())
-            draw.text((x, y), name, font=font, fill=(0, 0, 0))
-            font_cert_size = int(self.font_cert_size_entry.get())
-            font_cert = ImageFont.truetype(font_path, font_cert_size)
-            cert_x = int(self.cert_x_entry.get())
-            cert_y = int(self.cert_y_entry.get())
-            draw.text((cert_x, cert_y), certificate_number_padded, font=font_cert, fill=(0, 0, 0))
-            
+            job = self.build_job()
             # Obtém as dimensões atuais do canvas para limitar o tamanho da imagem
             canvas_width = self.preview_canvas.winfo_width() or 800
             canvas_height = self.preview_canvas.winfo_height() or 600
-            preview_image.thumbnail((canvas_width, canvas_height))
-            
-            img_tk = ImageTk.PhotoImage(preview_image)
-            self.preview_canvas.delete("all")
-            self.preview_canvas.config(width=preview_image.width, height=preview_image.height)
-            self.preview_canvas.create_image(0, 0, anchor=NW, image=img_tk)
-            self.preview_canvas.image = img_tk
+            # O desenho acontece em segundo plano; o resultado volta por show_preview
+            self.get_preview_renderer().request(job, (canvas_width, canvas_height))
         except Exception as e:
-            self.shake_window()
-            self.status_bar.config(text=f"Erro na pré-visualização: {str(e)}")
-
-    def get_font_path(self, font_name):
-        fonts_dir = "C:\\Windows\\Fonts"
-        for root, dirs, files in os.walk(fonts_dir):
-            for file in files:
-                if font_name.lower() in file.lower():
-                    return os.path.join(root, file)
-        raise FileNotFoundError(f"Fonte '{font_name}' não encontrada no diretório de fontes do Windows.")
+            self.show_preview_error(e)
+
+    def get_preview_renderer(self):
+        if self.preview_renderer is None:
+            from autocert.preview import PreviewRenderer
+            self.preview_renderer = PreviewRenderer(
+                self.font_index,
+                deliver=lambda image: self.window.after(0, lambda: self.show_preview(image)),
+                on_error=lambda error: self.window.after(0, lambda: self.show_preview_error(error)),
+            )
+        return self.preview_renderer
+
+    def show_preview(self, preview_image):
+        from PIL import ImageTk
+        img_tk = ImageTk.PhotoImage(preview_image)
+        self.preview_canvas.delete("all")
+        self.preview_canvas.config(width=preview_image.width, height=preview_image.height)
+        self.preview_canvas.create_image(0, 0, anchor=NW, image=img_tk)
+        self.preview_canvas.image = img_tk
+
+    def show_preview_error(self, error):
+        self.shake_window()
+        self.status_bar.config(text=f"Erro na pré-visualização: {str(error)}")
+
+    def build_fields(self, font_size, name_position, cert_font_size, cert_position):
+        # Nome e número vêm dos campos da tela; os demais, do layout aberto
+        align = {label: key for key, label in ALIGN_LABELS.items()}[self.name_align_combobox.get()]
+        max_width = int(self.name_max_width_entry.get() or 0) or None
+        color = self.name_color_entry.get().strip() or '#000000'
+        name_style = {'align': align, 'max_width': max_width, 'color': color}
+        if not self.layout_fields and name_style == {'align': 'left', 'max_width': None, 'color': '#000000'}:
+            return ()  # só os dois campos de sempre: o layout continua no formato antigo
+        fields = []
+        for field in self.layout_fields or default_fields(font_size, name_position, cert_font_size, cert_position):
+            if field.name == 'nome':
+                field = replace(field, position=name_position, size=font_size, **name_style)
+            elif field.name == 'numero':
+                field = replace(field, position=cert_position, size=cert_font_size)
+            fields.append(field)
+        for field in fields:
+            field.rgb()  # cor inválida aparece já na tela, não no meio do envio
+        return tuple(fields)
+
+    def build_job(self):
+        # Retrato imutável das configurações da tela, compartilhado com o modo em lote
+        if not getattr(self, 'template_path', None):
+            raise ValueError("Selecione um modelo de certificado!")
+        font_size = int(self.font_size_entry.get())
+        name_position = (int(self.x_entry.get()), int(self.y_entry.get()))
+        cert_font_size = int(self.font_cert_size_entry.get())
+        cert_position = (int(self.cert_x_entry.get()), int(self.cert_y_entry.get()))
+        return CertificateJob(
+            template_path=self.template_path,
+            data_path=getattr(self, 'data_path', None),
+            font_name=self.font_combobox.get(),
+            font_size=font_size,
+            name_position=name_position,
+            cert_font_size=cert_font_size,
+            cert_position=cert_position,
+            fields=self.build_fields(font_size, name_position, cert_font_size, cert_position),
+            output_name=self.output_name_entry.get(),
+            subject=self.subject_entry.get(),
+            content=self.content_text.get(1.0, END),
+            sender_email=self.email_entry.get(),
+            sender_password=self.password_entry.get(),
+            archive_dir=getattr(self, 'archive_dir', None),
+            # Opções de envio em config.ini: [sending] rate_limit, daily_limit, max_retries, engine, max_in_flight, pdf_backend
+            **sending_options(self.config, 'sending'),
+        )
 
     def select_data_file(self):
         self.data_path = askopenfilename(
             title="Selecionar Arquivo de Dados", 
-            filetypes=[("Arquivos Excel", "*.xlsx")]
+            filetypes=[("Planilhas", "*.xlsx *.csv"), ("Arquivos Excel", "*.xlsx"), ("Arquivos CSV", "*.csv")]
         )
         if self.data_path:
             self.status_bar.config(text=f"Planilha selecionada: {os.path.basename(self.data_path)}")
 
+    def select_archive_dir(self):
+        # Opcional: além de enviar, guarda uma cópia de cada certificado nesta pasta
+        self.archive_dir = askdirectory(title="Pasta para Arquivar os Certificados") or None
+        if self.archive_dir:
+            self.archive_button.config(text=os.path.basename(self.archive_dir) or self.archive_dir)
+            self.status_bar.config(text=f"Certificados serão arquivados em: {self.archive_dir}")
+        else:
+            self.archive_button.config(text="Não arquivar")
+
+    def open_layout(self):
+        # Carrega um layout salvo (ou escrito à mão) com todos os campos, além de nome e número
+        path = askopenfilename(title="Abrir Layout", filetypes=[("Arquivos de Layout", "*.ini")])
+        if not path:
+            return
+        try:
+            config = configparser.ConfigParser(interpolation=None)
+            config.read(path, encoding='utf-8')
+            options = layout_options(config)
+        except Exception as e:
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao abrir layout: {str(e)}")
+            return
+        fields = options.get('fields', ())
+        by_name = {field.name: field for field in fields}
+        name_field, number_field = by_name.get('nome'), by_name.get('numero')
+        font_size = name_field.size if name_field else options.get('font_size', CertificateJob.font_size)
+        name_position = name_field.position if name_field else options.get('name_position', CertificateJob.name_position)
+        cert_font_size = number_field.size if number_field else options.get('cert_font_size', CertificateJob.cert_font_size)
+        cert_position = number_field.position if number_field else options.get('cert_position', CertificateJob.cert_position)
+        for entry, value in ((self.font_size_entry, font_size), (self.x_entry, name_position[0]),
+                             (self.y_entry, name_position[1]), (self.font_cert_size_entry, cert_font_size),
+                             (self.cert_x_entry, cert_position[0]), (self.cert_y_entry, cert_position[1]),
+                             (self.name_max_width_entry, (name_field.max_width if name_field else None) or 0),
+                             (self.name_color_entry, name_field.color if name_field else '#000000')):
+            entry.delete(0, END)
+            entry.insert(0, str(value))
+        self.name_align_combobox.set(ALIGN_LABELS[name_field.align if name_field else 'left'])
+        self.font_combobox.set(options.get('font_name', CertificateJob.font_name))
+        self.layout_fields = fields
+        if config.has_option('job', 'template'):
+            template = os.path.join(os.path.dirname(os.path.abspath(path)), config.get('job', 'template'))
+            if os.path.exists(template):
+                self.template_path = template
+        self.status_bar.config(text=f"Layout carregado: {os.path.basename(path)} ({len(fields) or 2} campos)")
+        self.preview_certificate()
+
+    def save_layout(self):
+        # Gera o arquivo usado pelo modo em lote: python -m autocert --config layout.ini
+        try:
+            job = self.build_job()
+            path = asksaveasfilename(title="Salvar Layout", defaultextension=".ini",
+                                     filetypes=[("Arquivos de Layout", "*.ini")])
+            if path:
+                job.save_config(path)
+                self.status_bar.config(text=f"Layout salvo em {os.path.basename(path)}")
+                self.animate_success()
+        except Exception as e:
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao salvar layout: {str(e)}")
+
+    def export_print_pdf(self):
+        # Um único PDF com todos os certificados, uma página cada, sem enviar e-mails
+        try:
+            job = self.build_job()
+            if not job.data_path:
+                raise ValueError("Selecione a planilha de dados.")
+            path = asksaveasfilename(title="Exportar PDF para Impressão", defaultextension=".pdf",
+                                     filetypes=[("Arquivos PDF", "*.pdf")])
+            if not path:
+                return
+        except Exception as e:
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao exportar PDF: {str(e)}")
+            return
+
+        def on_progress(done, total):
+            progress = int(done / total * 100) if total else 0
+            self.window.after(0, lambda p=progress: self.progress.config(value=p))
+
+        def export():
+            try:
+                from autocert.pipeline import write_print_pdf
+                pages = write_print_pdf(job, self.font_index, path, on_progress=on_progress)
+                message = f"{pages} certificados exportados para {os.path.basename(path)}"
+                self.window.after(0, lambda: self.status_bar.config(text=message))
+                self.window.after(0, self.animate_success)
+            except Exception as e:
+                self.window.after(0, lambda: self.show_send_error(e))
+
+        self.status_bar.config(text="Exportando PDF para impressão...")
+        Thread(target=export, daemon=True).start()
+
+    def export_certificates(self, to_zip):
+        # Só gera os PDFs (um por linha, nomeados pelo número), sem enviar e-mails
+        if self.sending:
+            return
+        try:
+            job = self.build_job()
+            if not job.data_path:
+                raise ValueError("Selecione a planilha de dados.")
+            if to_zip:
+                destination = asksaveasfilename(title="Exportar Certificados", defaultextension=".zip",
+                                                filetypes=[("Arquivos ZIP", "*.zip")])
+            else:
+                destination = askdirectory(title="Pasta para os Certificados")
+            if not destination:
+                return
+        except Exception as e:
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao exportar certificados: {str(e)}")
+            return
+        self.metrics = BatchMetrics()
+
+        def on_progress(done, total):
+            progress = int(done / total * 100) if total else 0
+            message = f"Exportando... {progress}% Completo · {self.metrics.rate():.1f} cert/s"
+            self.window.after(0, lambda p=progress, m=message: (self.progress.config(value=p),
+                                                                self.status_bar.config(text=m)))
+
+        def export():
+            try:
+                from autocert.pipeline import export_certificates
+                result = export_certificates(job, self.font_index, destination, on_progress=on_progress,
+                                             metrics=self.metrics)
+                message = (f"{result.written} certificados exportados para {os.path.basename(destination)} "
+                           f"({result.written / max(self.metrics.elapsed(), 1e-6):.1f} cert/s)")
+                if result.failed:
+                    message += f", {result.failed} com erro"
+                message += self.cache_detail()
+                self.window.after(0, lambda: self.status_bar.config(text=message))
+                self.window.after(0, self.animate_error if result.failed else self.animate_success)
+            except Exception as e:
+                self.window.after(0, lambda: self.show_send_error(e))
+
+        self.status_bar.config(text="Exportando certificados...")
+        Thread(target=export, daemon=True).start()
+
+    def get_domain_checker(self):
+        if self.domain_checker is None:
+            from autocert.validation import DomainChecker
+            self.domain_checker = DomainChecker()
+        return self.domain_checker
+
+    def validate_spreadsheet(self):
+        # Confere a planilha (emails, números vazios ou repetidos) sem enviar nada
+        try:
+            job = self.build_job()
+            if not job.data_path:
+                raise ValueError("Selecione a planilha de dados.")
+        except Exception as e:
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao validar a planilha: {str(e)}")
+            return
+
+        def validate():
+            try:
+                from autocert.validation import validate_recipients
+                report = validate_recipients(job, self.get_domain_checker())
+                self.window.after(0, lambda: self.show_validation_report(report))
+            except Exception as e:
+                self.window.after(0, lambda: self.show_send_error(e))
+
+        self.status_bar.config(text="Validando planilha...")
+        Thread(target=validate, daemon=True).start()
+
+    def show_validation_report(self, report):
+        window = ttk.Toplevel(self.window)
+        window.title("Validação da Planilha")
+        window.geometry("700x450")
+        window.configure(bg=self.window.style.colors.bg)
+        text = ScrolledText(window, wrap=WORD, font=("Segoe UI", 11))
+        text.pack(expand=True, fill="both", padx=10, pady=10)
+        text.insert(END, report.text(limit=500))
+        text.configure(state="disabled")
+        self.status_bar.config(text=f"{report.valid} linhas prontas para envio, {len(report.rejected)} rejeitadas.")
+        if report.rejected:
+            self.animate_error()
+        else:
+            self.animate_success()
+
     def save_config(self):
         self.config['credentials']['email'] = self.email_entry.get()
         self.config['credentials']['password'] = self.password_entry.get()
@@ -346,109 +613,132 @@ class EditCertificate:
         self.status_bar.config(text="Credenciais salvas com sucesso!")
         self.animate_success()
 
-    def start_sending(self):
+    def start_sending(self, resume=False):
         if self.sending:
             return
+        try:
+            # Lê os widgets uma única vez, na thread da interface
+            job = self.build_job()
+            if not job.data_path:
+                raise ValueError("Selecione a planilha de dados!")
+        except Exception as e:
+            self.show_send_error(e)
+            return
         self.sending = True
         self.stop_requested = False
-        self.send_button.config(state="disabled")
-        self.stop_button.config(state="normal")
-        Thread(target=self.send_emails_in_parallel, daemon=True).start()
+        self.metrics = BatchMetrics()
+        self.set_sending_buttons(True)
+        Thread(target=self.send_emails_in_parallel, args=(job, resume), daemon=True).start()
+
+    def set_sending_buttons(self, sending):
+        state = "disabled" if sending else "normal"
+        self.send_button.config(state=state)
+        self.resume_button.config(state=state)
+        self.stop_button.config(state="normal" if sending else "disabled")
 
     def stop_sending(self):
+        # Enviar e Retomar só voltam quando a thread terminar e o diário estiver gravado:
+        # retomar antes disso mandaria de novo os emails que ainda estavam saindo
         self.stop_requested = True
-        self.sending = False
-        self.send_button.config(state="normal")
         self.stop_button.config(state="disabled")
-        self.status_bar.config(text="Envio interrompido pelo usuário.")
+        self.status_bar.config(text="Interrompendo... aguardando os envios em andamento.")
+
+    def finish_sending(self):
+        # Chamado na thread da interface quando a thread de envio termina
+        self.sending = False
+        self.set_sending_buttons(False)
+        if self.stop_requested:
+            sent = self.metrics.counters['sent']
+            self.status_bar.config(text=f"Envio interrompido pelo usuário após {sent} envios. "
+                                        f"Use \"Retomar Envio\" para continuar.")
 
-    def send_emails_in_parallel(self):
+    def send_emails_in_parallel(self, job, resume=False):
         try:
-            sender_email = self.email_entry.get()
-            sender_password = self.password_entry.get()
-            subject = self.subject_entry.get()
-            content = self.content_text.get(1.0, END)
-            df = pd.read_excel(self.data_path)
-            total = len(df)
-            queue = Queue()
-            lock = Lock()
-            threads = []
-            max_threads = 5  # número máximo de threads simultâneas
-
-            for index, row in df.iterrows():
-                queue.put((index, row))
-
-            def worker():
-                while not queue.empty() and not self.stop_requested:
-                    try:
-                        index, row = queue.get_nowait()
-                        name = row['Nome']
-                        email = row['Email']
-                        certificate_number = row['Numero do Certificado']
-                        certificate_image = self.create_certificate(name, certificate_number, self.template_path)
-                        self.send_email_generic(name, email, certificate_image, sender_email, sender_password, subject, content)
-                        progress = int((total - queue.qsize()) / total * 100)
-                        self.window.after(0, lambda p=progress: self.update_progress(p))
-                        queue.task_done()
-                    except Exception as e:
-                        with lock:
-                            print(f"Erro ao enviar email para {email}: {str(e)}")
-                            self.status_bar.config(text=f"Erro ao enviar para {email}: {str(e)}")
-                            self.animate_error()
-
-            for _ in range(max_threads):
-                thread = Thread(target=worker, daemon=True)
-                thread.start()
-                threads.append(thread)
-
-            for thread in threads:
-                thread.join()
-
-            if not self.stop_requested:
-                self.window.after(0, lambda: self.status_bar.config(text="Todos os certificados foram enviados!"))
-                self.animate_success()
-            self.sending = False
-            self.window.after(0, lambda: self.send_button.config(state="normal"))
-            self.window.after(0, lambda: self.stop_button.config(state="disabled"))
+            def on_progress(done, total):
+                # Sem total conhecido (CSV), a barra só avança quando a leitura terminar
+                progress = int(done / total * 100) if total else 0
+                detail = self.progress_detail()
+                self.window.after(0, lambda p=progress, d=detail: self.update_progress(p, d))
+
+            def on_error(email, error):
+                self.window.after(0, lambda: self.status_bar.config(text=f"Erro ao enviar para {email}: {str(error)}"))
+                self.window.after(0, self.animate_error)
+
+            from autocert.pipeline import send_certificates  # carrega o yagmail só no primeiro envio
+            from autocert.validation import validate_recipients
+            self.window.after(0, lambda: self.status_bar.config(text="Validando planilha..."))
+            validation = validate_recipients(job, self.get_domain_checker())
+            if validation.rejected:
+                warning = (f"{len(validation.rejected)} linhas com problemas serão puladas "
+                           f"(veja em Arquivo > Validar Planilha...)")
+                self.window.after(0, lambda: self.status_bar.config(text=warning))
+            result = send_certificates(job, self.font_index, on_progress=on_progress, on_error=on_error,
+                                       should_stop=lambda: self.stop_requested, resume=resume,
+                                       metrics=self.metrics, validation=validation)
+            rejected = f" · {result.invalid} rejeitados na validação" if result.invalid else ""
+
+            if result.quota_exceeded:
+                message = f"Limite diário atingido após {result.sent} envios. Use \"Retomar Envio\" mais tarde."
+                self.window.after(0, lambda: self.status_bar.config(text=message))
+                self.window.after(0, self.animate_error)
+            elif result.failed:
+                message = (f"{result.sent} enviados, {result.failed} com erro{rejected}. "
+                           f"Use \"Retomar Envio\" para tentar de novo.")
+                self.window.after(0, lambda: self.status_bar.config(text=message))
+                self.window.after(0, self.animate_error)
+            elif not self.stop_requested:
+                message = f"Todos os certificados foram enviados!{rejected}{self.cache_detail()}"
+                self.window.after(0, lambda: self.status_bar.config(text=message))
+                self.window.after(0, self.animate_success)
         except Exception as e:
-            self.shake_window()
-            self.status_bar.config(text=f"Erro: {str(e)}")
-            self.animate_error()
+            self.window.after(0, lambda: self.show_send_error(e))
+        finally:
+            # send_certificates só retorna depois de fechar o lote (diário gravado)
+            self.window.after(0, self.finish_sending)
+
+    def show_send_error(self, error):
+        self.shake_window()
+        self.status_bar.config(text=f"Erro: {str(error)}")
+        self.animate_error()
+
+    def progress_detail(self):
+        # Taxa dos últimos segundos, tempo restante e erros acumulados (não somem da barra de status)
+        rate, eta = self.metrics.rate(), self.metrics.eta()
+        detail = f" · {rate:.1f} msg/s"
+        if eta is not None:
+            detail += f" · faltam {format_duration(eta)}"
+        failed = self.metrics.counters['failed']
+        if failed:
+            detail += f" · {failed} com erro"
+        return detail
+
+    def cache_detail(self):
+        # Quantos PDFs vieram do cache (cache_dir em [sending] no config.ini), para o resumo final
+        hits, misses = self.metrics.counters['cache_hits'], self.metrics.counters['cache_misses']
+        if not hits and not misses:
+            return ""
+        return f" · cache: {hits} reaproveitados, {misses} gerados"
+
+    def update_progress(self, value, detail=""):
+        self.progress['value'] = value
+        self.status_bar.config(text=f"Enviando... {value}% Completo{detail}")
 
-    def create_certificate(self, name, certificate_number, template_path):
-        template_extension = os.path.splitext(template_path)[1].lower()
-        certificate_number = str(certificate_number)
-        certificate_number_padded = certificate_number.zfill(max(4, len(certificate_number)))
-        imagem = Image.open(template_path)
-        draw = ImageDraw.Draw(imagem)
-        font_name = self.font_combobox.get()
-        font_size = int(self.font_size_entry.get())
-        font_path = self.get_font_path(font_name)
-        font = ImageFont.truetype(font_path, font_size)
-        x = int(self.x_entry.get())
-        y = int(self.y_entry.get())
-        draw.text((x, y), name, font=font, fill=(0, 0, 0))
-        font_cert_size = int(self.font_cert_size_entry.get())
-        font_cert = ImageFont.truetype(font_path, font_cert_size)
-        cert_x = int(self.cert_x_entry.get())
-        cert_y = int(self.cert_y_entry.get())
-        draw.text((cert_x, cert_y), certificate_number_padded, font=font_cert, fill=(0, 0, 0))
-        certificate_image = f"{self.output_name_entry.get()}_{name}.pdf"
-        imagem.save(certificate_image)
-        return certificate_image
-
-    def send_email_generic(self, name, email, certificate_image, sender_email, sender_password, subject, content):
+    def export_metrics(self):
+        # Tempos por etapa, contadores e taxa do último envio, em JSON ou CSV
+        if self.metrics is None:
+            self.status_bar.config(text="Nenhum envio realizado ainda nesta sessão.")
+            return
+        path = asksaveasfilename(title="Exportar Métricas", defaultextension=".json",
+                                 filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
         try:
-            usuario = yagmail.SMTP(user=sender_email, password=sender_password)
-            personalized_content = content.replace("{name}", name)
-            usuario.send(to=email, subject=subject, contents=personalized_content, attachments=certificate_image)
-            print(f'Email enviado para {email} com sucesso!')
+            self.metrics.write(path)
+            self.status_bar.config(text=f"Métricas exportadas para {os.path.basename(path)}")
+            self.animate_success()
         except Exception as e:
-            raise RuntimeError(f"Erro ao enviar email para {email}: {str(e)}")
-
-    def update_progress(self, value):
-        self.progress['value'] = value
-        self.status_bar.config(text=f"Enviando... {value}% Completo")
+            self.shake_window()
+            self.status_bar.config(text=f"Erro ao exportar métricas: {str(e)}")
 
     def shake_window(self):
         # Efeito de "tremor" na janela para sinalizar erro
@@ -473,5 +763,8 @@ class EditCertificate:
 
 
 if __name__ == '__main__':
+    # Necessário para o pool de processos de renderização no .exe (PyInstaller)
+    import multiprocessing
+    multiprocessing.freeze_support()
     app = EditCertificate()
     app.window.mainloop()
\ No newline at end of file
@@ -0,0 +1 @@
+"""Núcleo do AutoCert: partes do pipeline que não dependem da interface Tk."""
@@ -0,0 +1,173 @@
+"""Modo em lote, sem interface gráfica: python -m autocert --config layout.ini"""
+import argparse
+import configparser
+import os
+import sys
+
+from autocert.fonts import FontIndex, font_dirs_from_config
+from autocert.job import CertificateJob
+from autocert.metrics import BatchMetrics, MetricsServer, format_duration
+from autocert.pipeline import EXPORT_NAMINGS, export_certificates, send_certificates, write_print_pdf
+from autocert.validation import validate_recipients
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m autocert', description="Gera e envia certificados sem a interface gráfica.")
+    parser.add_argument('--config', required=True, help="arquivo de layout/lote (INI)")
+    parser.add_argument('--data', help="planilha .xlsx ou .csv (substitui [job] data)")
+    parser.add_argument('--template', help="modelo do certificado (substitui [job] template)")
+    parser.add_argument('--archive-dir', help="também grava uma cópia de cada PDF nesta pasta")
+    parser.add_argument('--pdf-backend', choices=('vector', 'raster'),
+                        help="PDF vetorial (padrão, requer reportlab) ou imagem rasterizada")
+    parser.add_argument('--print-pdf', metavar='ARQUIVO',
+                        help="só gera um PDF único com todos os certificados para impressão, sem enviar e-mails")
+    parser.add_argument('--export', metavar='DESTINO',
+                        help="só gera os certificados, sem enviar e-mails, em uma pasta ou em um arquivo .zip")
+    parser.add_argument('--export-names', choices=EXPORT_NAMINGS, default='number',
+                        help="nome dos arquivos exportados: pelo número do certificado (padrão) ou pelo nome")
+    parser.add_argument('--cache-dir', help="reaproveita os PDFs já gerados em execuções anteriores (cache em disco)")
+    parser.add_argument('--cache-size', type=int, help="tamanho máximo do cache em MB (padrão: 1024)")
+    parser.add_argument('--validate-only', action='store_true',
+                        help="só valida a planilha (emails, números, repetidos) e mostra o relatório, sem enviar")
+    parser.add_argument('--validation-report', metavar='ARQUIVO',
+                        help="grava as linhas rejeitadas na validação em um .csv")
+    parser.add_argument('--check-domains', action='store_true', default=None,
+                        help="na validação, verifica também se o domínio de cada email existe (DNS)")
+    parser.add_argument('--allow-duplicate-emails', action='store_true', default=None,
+                        help="aceita o mesmo email em várias linhas (uma pessoa com vários certificados)")
+    parser.add_argument('--engine', choices=('threads', 'async'),
+                        help="motor de envio: threads (padrão) ou async (requer aiosmtplib)")
+    parser.add_argument('--max-in-flight', type=int, help="mensagens em andamento no motor async (as conexões SMTP são --threads)")
+    parser.add_argument('--rate', type=float, help="limite de mensagens por segundo")
+    parser.add_argument('--daily-limit', type=int, help="limite de mensagens por dia")
+    parser.add_argument('--max-retries', type=int, help="novas tentativas para falhas temporárias (4xx)")
+    parser.add_argument('--resume', action='store_true',
+                        help="retoma o lote: pula as linhas já enviadas e tenta de novo as que falharam")
+    parser.add_argument('--metrics-out', metavar='ARQUIVO',
+                        help="ao final, grava as métricas do lote (.json ou .csv)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="expõe as métricas no formato do Prometheus em http://127.0.0.1:PORTA/metrics")
+    parser.add_argument('--credentials', default='config.ini',
+                        help="arquivo com a seção [credentials] (padrão: config.ini)")
+    parser.add_argument('--threads', type=int, help="conexões SMTP simultâneas (padrão: 5)")
+    parser.add_argument('--render-workers', type=int, help="processos de renderização (padrão: um por núcleo)")
+    return parser.parse_args(argv)
+
+
+def load_credentials(path):
+    # As variáveis de ambiente têm prioridade para não deixar senhas no cron
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path, encoding='utf-8')
+    email = os.environ.get('AUTOCERT_EMAIL') or config.get('credentials', 'email', fallback=None)
+    password = os.environ.get('AUTOCERT_PASSWORD') or config.get('credentials', 'password', fallback=None)
+    return email, password, config
+
+
+def print_stage_summary(metrics):
+    snapshot = metrics.snapshot()
+    print(f"Tempo total: {format_duration(snapshot['elapsed'])}")
+    for stage, summary in snapshot['stages'].items():
+        if summary['count']:
+            print(f"  {stage:>12}: {summary['count']} x, média {summary['mean'] * 1000:.1f} ms, "
+                  f"p95 <= {summary['p95'] * 1000:.0f} ms, total {summary['sum']:.1f}s")
+    hits, misses = snapshot['counters']['cache_hits'], snapshot['counters']['cache_misses']
+    if hits or misses:
+        print(f"Cache: {hits} reaproveitados, {misses} gerados ({hits / (hits + misses):.0%} de acertos)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    email, password, credentials_config = load_credentials(args.credentials)
+    job = CertificateJob.from_config(
+        args.config,
+        template_path=args.template,
+        data_path=args.data,
+        threads=args.threads,
+        render_workers=args.render_workers,
+        archive_dir=args.archive_dir,
+        pdf_backend=args.pdf_backend,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size,
+        check_domains=args.check_domains,
+        allow_duplicate_emails=args.allow_duplicate_emails,
+        engine=args.engine,
+        max_in_flight=args.max_in_flight,
+        rate_limit=args.rate,
+        daily_limit=args.daily_limit,
+        max_retries=args.max_retries,
+        sender_email=email,
+        sender_password=password,
+    )
+    font_index = FontIndex(font_dirs_from_config(credentials_config))
+
+    if args.print_pdf:
+        pages = write_print_pdf(job, font_index, args.print_pdf)
+        print(f"{pages} certificados gravados em {args.print_pdf}")
+        return 0
+
+    validation = None
+    if not args.export:
+        # Validação prévia: o relatório sai antes de qualquer renderização ou envio
+        validation = validate_recipients(job)
+        print(validation.text(limit=20))
+        if args.validation_report:
+            validation.write_csv(args.validation_report)
+            print(f"Relatório de validação gravado em {args.validation_report}")
+        if args.validate_only:
+            return 1 if validation.rejected else 0
+
+    metrics = BatchMetrics()
+    server = MetricsServer(metrics, args.metrics_port) if args.metrics_port else None
+
+    if args.export:
+        def on_export_progress(done, total):
+            # Uma linha a cada 500 certificados: a exportação é rápida demais para uma por linha
+            if done % 500 == 0 or done == total:
+                print(f"Exportando... {done}/{total or '?'} - {metrics.rate():.1f} cert/s")
+
+        try:
+            result = export_certificates(job, font_index, args.export, naming=args.export_names,
+                                         on_progress=on_export_progress, metrics=metrics)
+        finally:
+            if server:
+                server.close()
+        elapsed = max(metrics.elapsed(), 1e-6)
+        print(f"{result.written} certificados exportados para {args.export} em {format_duration(elapsed)} "
+              f"({result.written / elapsed:.1f} cert/s), {result.failed} com erro.")
+        print_stage_summary(metrics)
+        if args.metrics_out:
+            metrics.write(args.metrics_out)
+            print(f"Métricas gravadas em {args.metrics_out}")
+        return 1 if result.failed else 0
+
+    def on_progress(done, total):
+        eta = metrics.eta()
+        speed = f" - {metrics.rate():.1f} msg/s" + (f", faltam {format_duration(eta)}" if eta is not None else "")
+        if total:
+            print(f"Enviando... {int(done / total * 100)}% Completo ({done}/{total}){speed}")
+        else:
+            print(f"Enviando... {done} certificados enviados{speed}")
+
+    def on_error(email, error):
+        print(f"Erro ao enviar email para {email}: {str(error)}")
+
+    try:
+        result = send_certificates(job, font_index, on_progress=on_progress, on_error=on_error, resume=args.resume,
+                                   metrics=metrics, validation=validation)
+    finally:
+        if server:
+            server.close()
+    print(f"Concluído: {result.sent} enviados, {result.failed} com erro, "
+          f"{result.skipped} já enviados anteriormente, {result.invalid} rejeitados na validação, "
+          f"{result.retries} novas tentativas.")
+    print_stage_summary(metrics)
+    if args.metrics_out:
+        metrics.write(args.metrics_out)
+        print(f"Métricas gravadas em {args.metrics_out}")
+    if result.quota_exceeded:
+        print("Limite diário atingido: rode novamente com --resume para continuar.")
+    return 1 if result.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
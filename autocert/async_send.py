@@ -0,0 +1,186 @@
+import asyncio
+
+import aiosmtplib
+import yagmail
+
+from autocert.metrics import BatchMetrics
+from autocert.pipeline import certificate_attachment, create_render_executor, render_worker_count
+from autocert.ratelimit import is_temporary_failure, retry_delay
+
+
+def aiosmtplib_kwargs(job):
+    # Mesmos padrões do yagmail: Gmail, SSL na porta 465 ou STARTTLS na 587
+    use_tls = True if job.smtp_ssl is None else job.smtp_ssl
+    start_tls = (not use_tls) if job.smtp_starttls is None else job.smtp_starttls
+    return {
+        'hostname': job.smtp_host or 'smtp.gmail.com',
+        'port': job.smtp_port or (465 if use_tls else 587),
+        'use_tls': use_tls,
+        'start_tls': start_tls,
+    }
+
+
+class AsyncSMTPPool:
+    """Até ``size`` conexões aiosmtplib persistentes, compartilhadas pelas tarefas do event loop.
+
+    Como o ``SMTPConnectionPool``, refaz a conexão após desconexão ou resposta
+    421 e tenta o envio mais uma vez.
+    """
+
+    RECONNECT_CODES = (421,)
+    # Conexões abertas ao mesmo tempo: evita uma avalanche de handshakes no início do lote
+    MAX_CONNECTING = 10
+
+    def __init__(self, user, password, size, metrics=None, **smtp_kwargs):
+        self.user = user
+        self.password = password
+        self.metrics = metrics or BatchMetrics()
+        self.smtp_kwargs = smtp_kwargs
+        self._connecting = asyncio.Semaphore(self.MAX_CONNECTING)
+        self._idle = asyncio.LifoQueue()
+        for _ in range(size):
+            self._idle.put_nowait(None)  # vaga ainda sem conexão aberta
+
+    async def _connect(self):
+        async with self._connecting:
+            with self.metrics.timer('smtp_connect'):
+                client = aiosmtplib.SMTP(**self.smtp_kwargs)
+                await client.connect()
+                await client.login(self.user, self.password)
+            return client
+
+    def _needs_reconnect(self, error):
+        if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+            return True
+        return isinstance(error, aiosmtplib.SMTPResponseException) and error.code in self.RECONNECT_CODES
+
+    @staticmethod
+    def _discard(client):
+        if client is not None:
+            client.close()
+
+    async def send(self, recipients, message):
+        client = await self._idle.get()
+        try:
+            if client is None or not client.is_connected:
+                self._discard(client)
+                client = None
+                client = await self._connect()
+            try:
+                with self.metrics.timer('smtp_send'):
+                    return await client.sendmail(self.user, recipients, message)
+            except aiosmtplib.SMTPException as e:
+                if not self._needs_reconnect(e):
+                    raise
+            # A conexão caiu: refaz o login e tenta mais uma vez
+            self._discard(client)
+            client = None
+            client = await self._connect()
+            with self.metrics.timer('smtp_send'):
+                return await client.sendmail(self.user, recipients, message)
+        except (asyncio.CancelledError, ConnectionError, TimeoutError):
+            # Conversa interrompida no meio: a conexão não é mais confiável
+            self._discard(client)
+            client = None
+            raise
+        finally:
+            self._idle.put_nowait(client)
+
+    async def close(self):
+        while not self._idle.empty():
+            client = self._idle.get_nowait()
+            if client is None:
+                continue
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                client.close()
+
+
+def run_async_engine(batch, font_index):
+    asyncio.run(_run(batch, font_index))
+
+
+async def _run(batch, font_index):
+    job = batch.job
+    executor = create_render_executor(job, font_index)
+    # Poucas conexões autenticadas (``job.threads``), como no motor de threads: abrir uma
+    # por mensagem em andamento faria o provedor limitar ou bloquear a conta. As
+    # ``job.max_in_flight`` mensagens em andamento se revezam nessas conexões.
+    pool = AsyncSMTPPool(job.sender_email, job.sender_password, size=job.threads,
+                         metrics=batch.metrics, **aiosmtplib_kwargs(job))
+    # Só monta as mensagens (MIME); a conexão é do AsyncSMTPPool
+    composer = yagmail.SMTP(user=job.sender_email, password=job.sender_password)
+    pending = asyncio.Semaphore(job.max_in_flight + render_worker_count(job) * 2)
+    tasks = set()
+    conversing = set()  # tarefas no meio de uma conversa SMTP: o Parar espera que terminem
+
+    async def send_with_retries(recipient, recipients, message):
+        # Retorna False se o envio foi interrompido antes de acontecer
+        attempt = 0
+        while True:
+            if not await batch.limiter.acquire_async(batch.should_stop):
+                return False
+            outcome = None
+            try:
+                conversing.add(asyncio.current_task())
+                try:
+                    await pool.send(recipients, message)
+                finally:
+                    conversing.discard(asyncio.current_task())
+                outcome = 'sent'
+            except Exception as e:
+                outcome = 'temporary' if is_temporary_failure(e) else 'failed'
+                if outcome == 'failed' or attempt >= job.max_retries:
+                    raise RuntimeError(f"Erro ao enviar email para {recipient.email}: {str(e)}") from e
+            finally:
+                batch.limiter.release(sent=outcome == 'sent', temporary_failure=outcome == 'temporary')
+            if outcome == 'sent':
+                return True
+            batch.retried()
+            await asyncio.sleep(retry_delay(attempt))
+            attempt += 1
+
+    async def process(recipient):
+        try:
+            certificate, timings = await asyncio.wrap_future(batch.submit_render(executor, recipient))
+            batch.rendered(recipient, timings)
+            recipients, message = composer.prepare_send(
+                to=recipient.email, subject=job.subject, contents=job.content.replace("{name}", recipient.name),
+                attachments=certificate_attachment(certificate))
+            if await send_with_retries(recipient, recipients, message):
+                print(f'Email enviado para {recipient.email} com sucesso!')
+                batch.succeeded(recipient)
+        except Exception as e:
+            batch.failed(recipient, e)
+        finally:
+            pending.release()
+
+    async def watch_stop():
+        # O botão Parar cancela o que ainda não começou a conversar com o servidor (as linhas
+        # ficam pendentes no diário). As conversas em andamento terminam e são registradas:
+        # cancelada depois dos dados, a mensagem pode já ter sido entregue e sairia de novo
+        # ao retomar. Nenhuma tarefa começa outra conversa: acquire_async vê o pedido de parada.
+        while not batch.user_stop():
+            await asyncio.sleep(0.1)
+        for task in list(tasks - conversing):
+            task.cancel()
+
+    watcher = asyncio.create_task(watch_stop())
+    try:
+        for recipient in batch.recipients():
+            await pending.acquire()
+            if batch.should_stop():
+                pending.release()
+                break
+            task = asyncio.create_task(process(recipient))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        watcher.cancel()
+        for task in list(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pool.close()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict
+
+# Mude quando o desenho dos certificados mudar: invalida tudo que já está em cache
+CACHE_VERSION = 1
+DEFAULT_CACHE_SIZE_MB = 1024
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _library_versions(backend):
+    # Outra versão do Pillow ou do reportlab pode gerar um PDF diferente
+    from PIL import __version__ as pillow_version
+    versions = {'pillow': pillow_version}
+    if backend == 'vector':
+        from reportlab import Version as reportlab_version
+        versions['reportlab'] = reportlab_version
+    return versions
+
+
+def store(path, data):
+    """Grava um PDF no cache de forma atômica; chamado pelos processos de renderização.
+
+    O cache é só um atalho: se a gravação falhar, o certificado segue normalmente.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    except OSError:
+        return False
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(data)
+        os.replace(temp_path, path)
+        return True
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+
+
+class RenderCache:
+    """Cache em disco dos PDFs já gerados, endereçado pelo conteúdo.
+
+    A chave é o hash dos bytes do modelo, dos campos do layout (com o hash de
+    cada fonte), do formato do PDF e dos valores das colunas que os campos
+    usam. Se qualquer um deles mudar, a linha é gerada de novo; as demais vêm
+    do disco. Cada leitura atualiza o mtime do arquivo, e ``prune`` remove os
+    menos usados até o cache caber em ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes, backend, render_args):
+        template_path, fields = render_args
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.columns = sorted({column for field in fields for column in field.columns()})
+        self.context_key = self._context_key(backend, template_path, fields)
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _context_key(backend, template_path, fields):
+        # Calculada uma vez por lote: o que é igual para todas as linhas
+        font_digests = {}
+        description = {
+            'version': CACHE_VERSION,
+            'backend': backend,
+            'libraries': _library_versions(backend),
+            'template': file_digest(template_path),
+            'fields': [],
+        }
+        for field in fields:
+            if field.font_path and field.font_path not in font_digests:
+                font_digests[field.font_path] = file_digest(field.font_path)
+            description['fields'].append({**asdict(field), 'font_path': font_digests.get(field.font_path)})
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def path(self, values):
+        # Só as colunas usadas pelos campos entram na chave: mudar o email não gera o PDF de novo
+        row = json.dumps([values.get(column) for column in self.columns], ensure_ascii=False)
+        key = hashlib.sha256(f"{self.context_key}\0{row}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def lookup(self, values):
+        """``(caminho, bytes)`` do PDF em cache, ou ``(caminho, None)`` se ainda não foi gerado."""
+        path = self.path(values)
+        try:
+            with open(path, 'rb') as cached:
+                data = cached.read()
+        except OSError:
+            return path, None
+        try:
+            os.utime(path)  # marca como usado agora, para a remoção por LRU
+        except OSError:
+            pass
+        return path, data
+
+    def prune(self):
+        """Remove os PDFs usados há mais tempo até o cache caber em ``max_bytes``; retorna quantos saíram."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
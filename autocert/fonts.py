@@ -0,0 +1,144 @@
+import json
+import os
+import sys
+from functools import lru_cache
+from threading import Event, Lock, Thread
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+# Mude quando o formato do cache do índice mudar: caches antigos são refeitos
+INDEX_CACHE_VERSION = 2
+
+
+@lru_cache(maxsize=32)
+def load_font(font_path, size):
+    """Objeto FreeType reutilizável, em cache por (caminho, tamanho)."""
+    # Pillow só é carregado no primeiro desenho, não na abertura da janela
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, size)
+
+
+def default_font_dirs():
+    if sys.platform.startswith('win'):
+        return [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+                os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'Fonts')]
+    if sys.platform == 'darwin':
+        return ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+    return ['/usr/share/fonts', '/usr/local/share/fonts',
+            os.path.expanduser('~/.fonts'), os.path.expanduser('~/.local/share/fonts')]
+
+
+def _mtime(directory):
+    # ``None`` para diretórios que não existem: criar um deles depois também invalida o cache
+    try:
+        return os.path.getmtime(directory)
+    except OSError:
+        return None
+
+
+def font_dirs_from_config(config):
+    """Diretórios definidos em config.ini: [fonts] dirs = /caminho1;/caminho2 (separador do sistema)."""
+    if not config.has_option('fonts', 'dirs'):
+        return None
+    return [d.strip() for d in config.get('fonts', 'dirs').split(os.pathsep) if d.strip()]
+
+
+class FontIndex:
+    """Índice nome da família -> arquivo de fonte, montado com uma única varredura.
+
+    A varredura pode rodar em segundo plano (``load_async``); as consultas esperam
+    por ela. Com ``cache_path`` o índice é salvo em disco e reaproveitado enquanto
+    o mtime dos diretórios varridos não mudar.
+    """
+
+    def __init__(self, font_dirs=None, cache_path=None):
+        self.font_dirs = list(font_dirs or default_font_dirs())
+        self.cache_path = cache_path
+        self._fonts = {}
+        self._fonts_lower = {}
+        self._ready = Event()
+        self._lock = Lock()
+        self._loading = False
+
+    def _scan(self):
+        fonts, dir_mtimes = {}, {}
+        for fonts_dir in self.font_dirs:
+            dir_mtimes[fonts_dir] = _mtime(fonts_dir)  # também os ausentes, como None
+            for root, dirs, files in os.walk(fonts_dir):
+                dir_mtimes[root] = _mtime(root)
+                for file in files:
+                    if file.lower().endswith(FONT_EXTENSIONS):
+                        # O primeiro arquivo encontrado com o nome vence, como antes
+                        fonts.setdefault(os.path.splitext(file)[0], os.path.join(root, file))
+        return fonts, dir_mtimes
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                cache = json.load(cache_file)
+            if cache.get('version') != INDEX_CACHE_VERSION or cache['font_dirs'] != self.font_dirs:
+                return None
+            for directory, mtime in cache['dir_mtimes'].items():
+                if _mtime(directory) != mtime:
+                    return None
+            return cache['fonts']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, fonts, dir_mtimes):
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as cache_file:
+                json.dump({'version': INDEX_CACHE_VERSION, 'font_dirs': self.font_dirs, 'dir_mtimes': dir_mtimes, 'fonts': fonts}, cache_file)
+        except OSError:
+            pass  # Sem cache em disco, o índice continua válido em memória
+
+    def load(self):
+        fonts = self._read_cache() if self.cache_path else None
+        if fonts is None:
+            fonts, dir_mtimes = self._scan()
+            if self.cache_path:
+                self._write_cache(fonts, dir_mtimes)
+        self._fonts = fonts
+        self._fonts_lower = {}
+        for name, path in fonts.items():
+            self._fonts_lower.setdefault(name.lower(), path)
+        self._ready.set()
+
+    def load_async(self, callback=None):
+        """Varre as fontes em uma thread e chama ``callback(index)`` ao terminar."""
+        with self._lock:
+            if self._loading or self._ready.is_set():
+                return
+            self._loading = True
+
+        def run():
+            try:
+                self.load()
+            finally:
+                self._ready.set()
+            if callback:
+                callback(self)
+
+        Thread(target=run, daemon=True).start()
+
+    def _wait(self):
+        with self._lock:
+            loading = self._loading
+        if not loading and not self._ready.is_set():
+            self.load()
+        self._ready.wait()
+
+    def families(self):
+        self._wait()
+        return sorted(self._fonts, key=str.lower)
+
+    def resolve(self, font_name):
+        self._wait()
+        path = self._fonts.get(font_name) or self._fonts_lower.get(font_name.lower())
+        if path:
+            return path
+        # Compatibilidade com o comportamento antigo: nome parcial do arquivo
+        wanted = font_name.lower()
+        for name, path in self._fonts.items():
+            if wanted in name.lower():
+                return path
+        raise FileNotFoundError(f"Fonte '{font_name}' não encontrada nos diretórios de fontes.")
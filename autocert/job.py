@@ -0,0 +1,230 @@
+import configparser
+import json
+import os
+from dataclasses import dataclass
+
+from autocert.cache import DEFAULT_CACHE_SIZE_MB, RenderCache
+from autocert.journal import user_data_dir
+from autocert.layout import default_fields, fields_from_config, fields_to_config, resolve_fonts
+
+
+def sending_options(config, section):
+    """Opções de envio (rate_limit, daily_limit, max_retries, engine, max_in_flight, pdf_backend,
+    cache_dir, cache_size, check_domains, allow_duplicate_emails) de uma seção INI."""
+    options = {}
+    if config.has_option(section, 'rate_limit'):
+        options['rate_limit'] = config.getfloat(section, 'rate_limit')
+    if config.has_option(section, 'daily_limit'):
+        options['daily_limit'] = config.getint(section, 'daily_limit')
+    if config.has_option(section, 'max_retries'):
+        options['max_retries'] = config.getint(section, 'max_retries')
+    if config.has_option(section, 'engine'):
+        options['engine'] = config.get(section, 'engine')
+    if config.has_option(section, 'max_in_flight'):
+        options['max_in_flight'] = config.getint(section, 'max_in_flight')
+    if config.has_option(section, 'pdf_backend'):
+        options['pdf_backend'] = config.get(section, 'pdf_backend')
+    if config.has_option(section, 'cache_dir'):
+        options['cache_dir'] = config.get(section, 'cache_dir')
+    if config.has_option(section, 'cache_size'):
+        options['cache_size'] = config.getint(section, 'cache_size')
+    for option in ('check_domains', 'allow_duplicate_emails'):
+        if config.has_option(section, option):
+            options[option] = config.getboolean(section, option)
+    return options
+
+
+def layout_options(config, defaults=None):
+    """Fonte, tamanhos, posições e campos das seções [layout] e [field:*] de um arquivo INI."""
+    defaults = defaults or CertificateJob
+    values = {}
+    if config.has_section('layout'):
+        layout = config['layout']
+        values['font_name'] = layout.get('font', defaults.font_name)
+        values['font_size'] = layout.getint('font_size', defaults.font_size)
+        values['name_position'] = (layout.getint('name_x', defaults.name_position[0]),
+                                   layout.getint('name_y', defaults.name_position[1]))
+        values['cert_font_size'] = layout.getint('number_font_size', defaults.cert_font_size)
+        values['cert_position'] = (layout.getint('number_x', defaults.cert_position[0]),
+                                   layout.getint('number_y', defaults.cert_position[1]))
+    fields = fields_from_config(config)
+    if fields:
+        values['fields'] = fields
+    return values
+
+
+@dataclass(frozen=True)
+class CertificateJob:
+    """Configuração de um lote, lida uma única vez (da GUI ou de um arquivo).
+
+    É imutável: as threads de trabalho só leem este objeto, nunca os widgets Tk.
+    """
+
+    template_path: str
+    data_path: str
+    font_name: str = 'times'
+    font_size: int = 100
+    name_position: tuple = (200, 1340)
+    cert_font_size: int = 60
+    cert_position: tuple = (570, 1930)
+    output_name: str = 'certificado'
+    subject: str = 'Seu Certificado Está Pronto!'
+    content: str = 'Prezado {name},\n\nSegue seu certificado em anexo.\n\nAtenciosamente,\nEquipe ...'
+    sender_email: str = ''
+    sender_password: str = ''
+    smtp_host: str = None
+    smtp_port: int = None
+    smtp_ssl: bool = None
+    smtp_starttls: bool = None
+    threads: int = 5
+    render_workers: int = None  # None: um processo de renderização por núcleo
+    archive_dir: str = None  # se definido, guarda também uma cópia de cada PDF
+    journal_path: str = None  # padrão: ao lado da planilha (ver journal_file)
+    send_log_path: str = None  # padrão: no perfil do usuário (ver send_log_file)
+    rate_limit: float = None  # mensagens por segundo; None: sem limite
+    daily_limit: int = None  # mensagens por dia (cota do provedor)
+    max_retries: int = 3  # novas tentativas para falhas temporárias (4xx)
+    engine: str = 'threads'  # 'threads' ou 'async' (aiosmtplib)
+    max_in_flight: int = 100  # mensagens em andamento no motor async; as conexões SMTP são ``threads``
+    pdf_backend: str = 'vector'  # 'vector' (reportlab, texto vetorial) ou 'raster' (imagem do Pillow)
+    fields: tuple = ()  # TextFields do layout; vazio: só nome e número, como antes (ver layout)
+    cache_dir: str = None  # se definido, reaproveita os PDFs já gerados (ver RenderCache)
+    cache_size: int = DEFAULT_CACHE_SIZE_MB  # limite do cache em disco, em MB
+    check_domains: bool = False  # valida também se o domínio de cada email existe (DNS)
+    allow_duplicate_emails: bool = False  # aceita o mesmo email em várias linhas (vários certificados)
+
+    def layout(self):
+        return self.fields or default_fields(self.font_size, self.name_position,
+                                             self.cert_font_size, self.cert_position)
+
+    def render_args(self, font_index):
+        # Argumentos de RenderContext; simples o bastante para irem a outros processos
+        return self.template_path, resolve_fonts(self.layout(), font_index, self.font_name)
+
+    def render_context(self, font_index):
+        from autocert.render import create_render_context
+        return create_render_context(self.pdf_backend, self.render_args(font_index))
+
+    def render_cache(self, font_index):
+        # None sem cache_dir; a chave do lote (hash do modelo e das fontes) é calculada aqui, uma vez
+        if not self.cache_dir:
+            return None
+        return RenderCache(self.cache_dir, self.cache_size * 1024 * 1024, self.pdf_backend,
+                           self.render_args(font_index))
+
+    def concurrency(self):
+        # Envios simultâneos: uma conversa SMTP por conexão, nos dois motores
+        return self.threads
+
+    def send_log_file(self):
+        # Um registro de envios para todas as planilhas, usado no limite diário
+        return self.send_log_path or os.path.join(user_data_dir(), 'envios.sqlite')
+
+    def journal_file(self):
+        # Um diário por planilha: é o que permite retomar o mesmo lote depois
+        return self.journal_path or f"{self.data_path}.autocert.sqlite"
+
+    def smtp_kwargs(self):
+        # Só repassa ao yagmail o que foi definido; o resto fica no padrão (Gmail)
+        options = {'host': self.smtp_host, 'port': self.smtp_port,
+                   'smtp_ssl': self.smtp_ssl, 'smtp_starttls': self.smtp_starttls}
+        return {key: value for key, value in options.items() if value is not None}
+
+    @classmethod
+    def from_config(cls, path, **overrides):
+        """Lê um arquivo de layout INI (seções [job], [layout], [field:*], [smtp] e [credentials])."""
+        config = configparser.ConfigParser(interpolation=None)
+        if not config.read(path, encoding='utf-8'):
+            raise FileNotFoundError(f"Arquivo de configuração '{path}' não encontrado.")
+        base_dir = os.path.dirname(os.path.abspath(path))
+        values = {}
+
+        def path_option(section, option, field):
+            if config.has_option(section, option):
+                values[field] = os.path.join(base_dir, config.get(section, option))
+
+        path_option('job', 'template', 'template_path')
+        path_option('job', 'data', 'data_path')
+        path_option('job', 'archive_dir', 'archive_dir')
+        path_option('job', 'journal', 'journal_path')
+        path_option('job', 'send_log', 'send_log_path')
+        for option, field in (('output_name', 'output_name'), ('subject', 'subject'), ('content', 'content')):
+            if config.has_option('job', option):
+                values[field] = config.get('job', option)
+        if config.has_option('job', 'content_json'):
+            # Gravado pelo save_config: o INI apagaria o recuo das linhas e a quebra de linha final
+            values['content'] = json.loads(config.get('job', 'content_json'))
+        if config.has_option('job', 'content_file'):
+            with open(os.path.join(base_dir, config.get('job', 'content_file')), encoding='utf-8') as content_file:
+                values['content'] = content_file.read()
+        if config.has_option('job', 'threads'):
+            values['threads'] = config.getint('job', 'threads')
+        if config.has_option('job', 'render_workers'):
+            values['render_workers'] = config.getint('job', 'render_workers')
+        values.update(sending_options(config, 'job'))
+        path_option('job', 'cache_dir', 'cache_dir')
+
+        values.update(layout_options(config, cls))
+
+        if config.has_section('smtp'):
+            smtp = config['smtp']
+            values['smtp_host'] = smtp.get('host')
+            values['smtp_port'] = smtp.getint('port')
+            values['smtp_ssl'] = smtp.getboolean('ssl')
+            values['smtp_starttls'] = smtp.getboolean('starttls')
+
+        if config.has_section('credentials'):
+            values['sender_email'] = config.get('credentials', 'email', fallback='')
+            values['sender_password'] = config.get('credentials', 'password', fallback='')
+
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        if 'template_path' not in values or 'data_path' not in values:
+            raise ValueError("Informe o modelo (template) e a planilha (data) do lote.")
+        return cls(**values)
+
+    def save_config(self, path):
+        """Grava o layout e o conteúdo do lote (sem credenciais) em um arquivo INI."""
+        config = configparser.ConfigParser(interpolation=None)
+        config['job'] = {
+            'template': self.template_path,
+            'data': self.data_path,
+            'output_name': self.output_name,
+            'subject': self.subject,
+            'content_json': json.dumps(self.content, ensure_ascii=False),
+            'threads': str(self.threads),
+            'pdf_backend': self.pdf_backend,
+        }
+        if self.render_workers:
+            config['job']['render_workers'] = str(self.render_workers)
+        if self.archive_dir:
+            config['job']['archive_dir'] = self.archive_dir
+        if self.journal_path:
+            config['job']['journal'] = self.journal_path
+        if self.send_log_path:
+            config['job']['send_log'] = self.send_log_path
+        if self.rate_limit:
+            config['job']['rate_limit'] = str(self.rate_limit)
+        if self.daily_limit:
+            config['job']['daily_limit'] = str(self.daily_limit)
+        config['job']['max_retries'] = str(self.max_retries)
+        if self.check_domains:
+            config['job']['check_domains'] = 'true'
+        if self.allow_duplicate_emails:
+            config['job']['allow_duplicate_emails'] = 'true'
+        if self.cache_dir:
+            config['job']['cache_dir'] = self.cache_dir
+            config['job']['cache_size'] = str(self.cache_size)
+        config['job']['engine'] = self.engine
+        config['job']['max_in_flight'] = str(self.max_in_flight)
+        config['layout'] = {
+            'font': self.font_name,
+            'font_size': str(self.font_size),
+            'name_x': str(self.name_position[0]),
+            'name_y': str(self.name_position[1]),
+            'number_font_size': str(self.cert_font_size),
+            'number_x': str(self.cert_position[0]),
+            'number_y': str(self.cert_position[1]),
+        }
+        fields_to_config(config, self.fields)
+        with open(path, 'w', encoding='utf-8') as configfile:
+            config.write(configfile)
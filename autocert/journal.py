@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import sys
+import time
+from threading import Lock
+
+RENDERED = 'rendered'
+SENT = 'sent'
+FAILED = 'failed'
+
+
+def row_key(recipient):
+    # Identifica a linha entre execuções mesmo que a planilha seja reordenada
+    return f"{recipient.email}|{recipient.certificate_number}"
+
+
+class JobJournal:
+    """Diário persistente (SQLite) do estado de cada linha de um lote.
+
+    As gravações ficam em memória e vão para o disco em lotes (a cada
+    ``flush_every`` registros ou ``flush_interval`` segundos), para não atrasar
+    o envio. Se o processo morrer, no máximo esse último lote se perde, e essas
+    linhas são reenviadas ao retomar.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=1.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " key TEXT PRIMARY KEY, email TEXT, state TEXT NOT NULL, error TEXT, updated_at REAL)"
+        )
+        self._db.commit()
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._db.execute("DELETE FROM rows")
+            self._db.commit()
+
+    def finished(self):
+        """Chaves das linhas já enviadas, que uma retomada deve pular."""
+        with self._lock:
+            return {key for (key,) in self._db.execute("SELECT key FROM rows WHERE state = ?", (SENT,))}
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM rows GROUP BY state"))
+
+    def failures(self):
+        with self._lock:
+            return list(self._db.execute("SELECT email, error FROM rows WHERE state = ?", (FAILED,)))
+
+    def record(self, recipient, state, error=None):
+        with self._lock:
+            self._pending.append((row_key(recipient), str(recipient.email), state,
+                                  None if error is None else str(error), time.time()))
+            due = (len(self._pending) >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending:
+            self._db.executemany(
+                "INSERT INTO rows (key, email, state, error, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET state = excluded.state, error = excluded.error,"
+                " updated_at = excluded.updated_at",
+                self._pending,
+            )
+            self._db.commit()
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def user_data_dir():
+    """Pasta do AutoCert no perfil do usuário, para o que vale em todas as planilhas."""
+    if sys.platform.startswith('win'):
+        return os.path.join(os.environ.get('APPDATA') or os.path.expanduser('~'), 'AutoCert')
+    if sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Application Support/AutoCert')
+    return os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'), 'autocert')
+
+
+class SendLog:
+    """Registro (SQLite) de cada email enviado, por remetente, para o limite diário do provedor.
+
+    Ao contrário do ``JobJournal``, nunca é apagado por um lote novo e é um só
+    para todas as planilhas: a cota do provedor é da conta, não do arquivo.
+    Como no diário, as gravações vão para o disco em lotes; registros mais
+    antigos que ``retention`` segundos são descartados ao abrir.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=1.0, retention=7 * 24 * 60 * 60):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Dois lotes da mesma conta podem rodar ao mesmo tempo: espera o outro gravar
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sends (sender TEXT NOT NULL, sent_at REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS sends_by_sender ON sends (sender, sent_at)")
+        self._db.execute("DELETE FROM sends WHERE sent_at < ?", (time.time() - retention,))
+        self._db.commit()
+
+    @staticmethod
+    def _key(sender):
+        return (sender or '').strip().lower()
+
+    def record(self, sender):
+        with self._lock:
+            self._pending.append((self._key(sender), time.time()))
+            if (len(self._pending) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def sent_since(self, sender, timestamp):
+        """Envios de ``sender`` a partir de ``timestamp``, de qualquer lote ou planilha."""
+        with self._lock:
+            self._flush_locked()
+            (count,) = self._db.execute("SELECT COUNT(*) FROM sends WHERE sender = ? AND sent_at >= ?",
+                                        (self._key(sender), timestamp)).fetchone()
+            return count
+
+    def _flush_locked(self):
+        if self._pending:
+            self._db.executemany("INSERT INTO sends (sender, sent_at) VALUES (?, ?)", self._pending)
+            self._db.commit()
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._db.close()
@@ -0,0 +1,195 @@
+import string
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from autocert.fonts import load_font
+
+NAME_COLUMN = 'Nome'
+NUMBER_COLUMN = 'Numero do Certificado'
+ALIGNMENTS = ('left', 'center', 'right')
+KINDS = ('text', 'qrcode')
+
+
+@dataclass(frozen=True)
+class TextField:
+    """Um campo do certificado, ligado às colunas da planilha por ``{Coluna}`` em ``text``.
+
+    ``position`` é o ponto de ancoragem em pixels do modelo: o topo do texto,
+    à esquerda, no centro ou à direita conforme ``align``. Com ``max_width`` o
+    tamanho da fonte diminui (até ``min_size``) para o texto caber. Com
+    ``kind = 'qrcode'`` o texto vira um QR code de ``size`` pixels de lado.
+    """
+
+    name: str
+    text: str
+    position: tuple
+    size: int
+    font: str = None  # família; None usa a fonte principal do lote
+    color: str = '#000000'
+    align: str = 'left'
+    max_width: int = None
+    min_size: int = 10
+    kind: str = 'text'  # 'text' ou 'qrcode'
+    font_path: str = None  # preenchido por resolve_fonts antes de renderizar
+
+    def columns(self):
+        return [field for _, field, _, _ in string.Formatter().parse(self.text) if field]
+
+    def value(self, values):
+        return self.text.format_map(values)
+
+    def rgb(self):
+        return _parse_color(self.color)
+
+
+@lru_cache(maxsize=256)
+def _parse_color(color):
+    from PIL import ImageColor
+    return ImageColor.getrgb(color)[:3]
+
+
+def pad_certificate_number(certificate_number):
+    certificate_number = str(certificate_number)
+    return certificate_number.zfill(max(4, len(certificate_number)))
+
+
+def default_fields(font_size, name_position, cert_font_size, cert_position):
+    # Os dois campos fixos de antes: nome e número, pretos e alinhados à esquerda
+    return (
+        TextField('nome', f'{{{NAME_COLUMN}}}', tuple(name_position), font_size),
+        TextField('numero', f'{{{NUMBER_COLUMN}}}', tuple(cert_position), cert_font_size),
+    )
+
+
+def resolve_fonts(fields, font_index, default_font):
+    """Resolve a família de cada campo para o arquivo de fonte (uma consulta por família)."""
+    paths = {}
+    resolved = []
+    for field in fields:
+        family = field.font or default_font
+        if family not in paths:
+            paths[family] = font_index.resolve(family)
+        resolved.append(replace(field, font_path=paths[family]))
+    return tuple(resolved)
+
+
+def check_columns(fields, columns):
+    """Falha antes do lote se algum campo usa uma coluna que não existe na planilha."""
+    available = set(columns)
+    for field in fields:
+        for column in field.columns():
+            if column not in available:
+                raise ValueError(f"O campo '{field.name}' usa a coluna '{column}', que não existe na planilha.")
+
+
+def row_values(name, certificate_number, columns=None):
+    # Valores de uma linha para os campos; o número sai com zeros à esquerda, como sempre
+    values = dict(columns or {})
+    values[NAME_COLUMN] = '' if name is None else str(name)
+    values[NUMBER_COLUMN] = pad_certificate_number(certificate_number)
+    return values
+
+
+class SampleValues(dict):
+    """Valores de exemplo da pré-visualização: colunas sem exemplo aparecem como ``<Coluna>``."""
+
+    def __missing__(self, key):
+        return f'<{key}>'
+
+
+@lru_cache(maxsize=16384)
+def measure(font_path, size, text):
+    """Largura do texto em pixels; em cache por (fonte, tamanho, texto)."""
+    return load_font(font_path, size).getlength(text)
+
+
+@lru_cache(maxsize=16384)
+def fit_size(font_path, size, min_size, max_width, text):
+    """Maior tamanho <= ``size`` em que o texto cabe em ``max_width`` (no mínimo ``min_size``)."""
+    width = measure(font_path, size, text)
+    if not max_width or width <= max_width:
+        return size
+    # A largura é quase proporcional ao tamanho: estima direto e corrige nos dois sentidos,
+    # porque hinting e kerning fazem a estimativa errar para mais ou para menos
+    fitted = max(min_size, min(size - 1, int(size * max_width / width)))
+    while fitted > min_size and measure(font_path, fitted, text) > max_width:
+        fitted -= 1
+    while fitted < size - 1 and measure(font_path, fitted + 1, text) <= max_width:
+        fitted += 1
+    return fitted
+
+
+@lru_cache(maxsize=1024)
+def qr_matrix(text):
+    # Módulos escuros do QR code como tupla de linhas (usa o codificador do reportlab)
+    from reportlab.graphics.barcode.qrencoder import QRCode, QRErrorCorrectLevel
+    qr = QRCode(None, QRErrorCorrectLevel.M)
+    qr.addData(text)
+    qr.make()
+    count = qr.getModuleCount()
+    return tuple(tuple(qr.isDark(row, column) for column in range(count)) for row in range(count))
+
+
+def placement(field, text):
+    """``(tamanho, x_esquerda)`` do campo já ajustado à largura máxima, em pixels do modelo."""
+    if field.kind == 'qrcode':
+        size, width = field.size, field.size
+    else:
+        size = fit_size(field.font_path, field.size, field.min_size, field.max_width, text)
+        width = measure(field.font_path, size, text)
+    x = field.position[0]
+    if field.align == 'center':
+        x -= width / 2
+    elif field.align == 'right':
+        x -= width
+    return size, x
+
+
+def fields_from_config(config):
+    """Campos das seções ``[field:nome]`` de um arquivo INI, na ordem do arquivo (vazio se não houver)."""
+    fields = []
+    for section in config.sections():
+        if not section.startswith('field:'):
+            continue
+        options = config[section]
+        name = section.split(':', 1)[1].strip()
+        max_width = options.getint('max_width', fallback=0)
+        field = TextField(
+            name=name,
+            text=options.get('text', fallback=''),
+            position=(options.getint('x', fallback=0), options.getint('y', fallback=0)),
+            size=options.getint('size', fallback=60),
+            font=options.get('font', fallback=None) or None,
+            color=options.get('color', fallback='#000000'),
+            align=options.get('align', fallback='left'),
+            max_width=max_width or None,
+            min_size=options.getint('min_size', fallback=10),
+            kind=options.get('type', fallback='text'),
+        )
+        if field.align not in ALIGNMENTS:
+            raise ValueError(f"Campo '{name}': alinhamento '{field.align}' inválido (use {', '.join(ALIGNMENTS)}).")
+        if field.kind not in KINDS:
+            raise ValueError(f"Campo '{name}': tipo '{field.kind}' inválido (use {', '.join(KINDS)}).")
+        field.rgb()  # cor inválida falha aqui, não no meio do lote
+        fields.append(field)
+    return tuple(fields)
+
+
+def fields_to_config(config, fields):
+    for field in fields:
+        section = {
+            'text': field.text,
+            'x': str(field.position[0]),
+            'y': str(field.position[1]),
+            'size': str(field.size),
+            'color': field.color,
+            'align': field.align,
+        }
+        if field.font:
+            section['font'] = field.font
+        if field.max_width:
+            section['max_width'] = str(field.max_width)
+            section['min_size'] = str(field.min_size)
+        if field.kind != 'text':
+            section['type'] = field.kind
+        config[f'field:{field.name}'] = section
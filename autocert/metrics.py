@@ -0,0 +1,231 @@
+import bisect
+import csv
+import json
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock, Thread
+
+# Limites (em segundos) dos baldes dos histogramas, do render rápido ao SMTP lento
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Etapas medidas em um lote, na ordem do pipeline ('validate': a validação prévia da planilha
+# inteira, uma vez; 'cache': consultas e gravações no RenderCache)
+STAGES = ('validate', 'read', 'cache', 'render', 'encode', 'archive', 'smtp_connect', 'smtp_send')
+COUNTERS = ('sent', 'exported', 'failed', 'skipped', 'invalid', 'retries', 'cache_hits', 'cache_misses')
+# Contadores que marcam uma linha concluída com sucesso (envio ou só exportação): entram na taxa
+DONE_COUNTERS = ('sent', 'exported')
+
+# Janela usada para a taxa "ao vivo" (e o ETA): reage a mudanças sem oscilar a cada envio
+RATE_WINDOW = 30.0
+
+
+class Histogram:
+    """Histograma de latências com baldes fixos, no formato do Prometheus."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # o último balde é +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Interpolação linear dentro do balde, como o histogram_quantile do Prometheus,
+        # limitada ao mínimo e ao máximo observados
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = self.min
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                lower = max(lower, self.min)
+                return round(lower + (upper - lower) * (rank - seen) / count, 6)
+            seen += count
+            lower = bound
+        return round(self.max, 6)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'min': round(self.min, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 6) if self.count else None,
+        }
+
+
+class BatchMetrics:
+    """Métricas de um lote: histogramas por etapa, contadores, taxa e ETA.
+
+    É seguro entre threads. O motor de envio alimenta o objeto; a interface
+    (ou o endpoint do Prometheus) só lê ``rate()``, ``eta()`` e ``snapshot()``.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.total = None
+        self.started = time.monotonic()
+        self.finished = None
+        self._recent = deque()  # instantes das últimas linhas concluídas, dentro de RATE_WINDOW
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter, amount=1):
+        now = time.monotonic()
+        with self.lock:
+            self.counters[counter] += amount
+            if counter in DONE_COUNTERS:
+                self._recent.append(now)
+                while self._recent[0] < now - RATE_WINDOW:
+                    self._recent.popleft()
+
+    def set_total(self, total):
+        with self.lock:
+            self.total = total
+
+    def finish(self):
+        with self.lock:
+            self.finished = time.monotonic()
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def rate(self):
+        """Linhas concluídas por segundo nos últimos ``RATE_WINDOW`` segundos (ou desde o início)."""
+        with self.lock:
+            now = self.finished or time.monotonic()
+            span = min(RATE_WINDOW, now - self.started)
+            recent = sum(1 for sent_at in self._recent if sent_at >= now - RATE_WINDOW)
+        return recent / span if span > 0 else 0.0
+
+    def eta(self):
+        """Segundos estimados até o fim do lote, ou ``None`` sem total ou sem taxa."""
+        with self.lock:
+            if self.total is None:
+                return None
+            remaining = self.total - sum(self.counters[name] for name in DONE_COUNTERS + ('failed', 'skipped', 'invalid'))
+        rate = self.rate()
+        return max(remaining, 0) / rate if rate else None
+
+    def snapshot(self):
+        rate, eta = self.rate(), self.eta()
+        with self.lock:
+            return {
+                'elapsed': round(self.elapsed(), 3),
+                'total': self.total,
+                'counters': dict(self.counters),
+                'rate': round(rate, 3),
+                'eta': round(eta, 1) if eta is not None else None,
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+            }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(self.snapshot(), output, indent=2)
+
+    def write_csv(self, path):
+        # Uma linha por etapa; os contadores vão como linhas sem histograma
+        snapshot = self.snapshot()
+        fields = ('stage', 'count', 'sum', 'mean', 'min', 'p50', 'p95', 'max')
+        with open(path, 'w', newline='', encoding='utf-8') as output:
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            for stage, summary in snapshot['stages'].items():
+                writer.writerow({'stage': stage, **summary})
+            for counter, value in snapshot['counters'].items():
+                writer.writerow({'stage': counter, 'count': value})
+
+    def write(self, path):
+        """Exporta em JSON ou CSV, conforme a extensão do arquivo."""
+        if path.lower().endswith('.csv'):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+    def prometheus_text(self):
+        rate, eta = self.rate(), self.eta()
+        lines = ['# HELP autocert_stage_seconds Duração de cada etapa do lote.',
+                 '# TYPE autocert_stage_seconds histogram']
+        with self.lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'autocert_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'autocert_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'autocert_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for counter, value in self.counters.items():
+                lines.append(f'# TYPE autocert_{counter}_total counter')
+                lines.append(f'autocert_{counter}_total {value}')
+            total = self.total
+        lines.append('# TYPE autocert_send_rate gauge')
+        lines.append(f'autocert_send_rate {rate:.3f}')
+        if total is not None:
+            lines.append('# TYPE autocert_rows gauge')
+            lines.append(f'autocert_rows {total}')
+        if eta is not None:
+            lines.append('# TYPE autocert_eta_seconds gauge')
+            lines.append(f'autocert_eta_seconds {eta:.1f}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Endpoint HTTP ``/metrics`` (texto do Prometheus) para execuções sem interface."""
+
+    def __init__(self, metrics, port, host='127.0.0.1'):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # só no modo em lote
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # sem uma linha no terminal a cada coleta
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60}:{rest % 60:02d}"
@@ -0,0 +1,156 @@
+import io
+import zlib
+
+from PIL import Image
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.pdfgen.canvas import Canvas
+
+from autocert.fonts import load_font
+from autocert.layout import placement, qr_matrix
+from autocert.render import load_template
+
+# Qualidade do JPEG usado para o modelo quando ele fica menor que o PNG sem perdas
+TEMPLATE_JPEG_QUALITY = 90
+TEMPLATE_XOBJECT = 'autocert-template'
+
+
+def _flatten(image):
+    # O PDF não precisa da transparência do modelo: compõe sobre fundo branco
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode_template(image):
+    """Comprime o modelo uma única vez (Flate ou JPEG, o que for menor); retorna ``(filtro, bytes)``."""
+    image = _flatten(image)
+    flate = zlib.compress(image.tobytes(), 6)
+    jpeg = io.BytesIO()
+    image.save(jpeg, format='JPEG', quality=TEMPLATE_JPEG_QUALITY, optimize=True)
+    if len(jpeg.getvalue()) < len(flate):
+        return 'DCTDecode', jpeg.getvalue()
+    return 'FlateDecode', flate
+
+
+def template_xobject(size, encoded):
+    # O reportlab marca o XObject com o documento em que foi registrado: um objeto
+    # novo por arquivo, mas sempre com o mesmo fluxo já comprimido
+    xobject = PDFImageXObject(TEMPLATE_XOBJECT)
+    xobject.width, xobject.height = size
+    xobject.bitsPerComponent = 8
+    xobject.colorSpace = 'DeviceRGB'
+    xobject.mask = None
+    xobject._filters = (encoded[0],)
+    xobject.streamContent = encoded[1]
+    return xobject
+
+
+def register_font(font_path):
+    name = f"autocert-{font_path}"
+    if name not in pdfmetrics.getRegisteredFontNames():
+        try:
+            pdfmetrics.registerFont(TTFont(name, font_path))
+        except TTFError as e:
+            raise ValueError(f"A fonte '{font_path}' não pode ser embutida no PDF vetorial "
+                             f"({e}); use pdf_backend = raster.") from e
+    return name
+
+
+class VectorRenderContext:
+    """Certificados em PDF vetorial: o modelo é uma imagem comprimida uma vez e o texto é texto de verdade.
+
+    Mesmos argumentos (modelo e campos) e coordenadas (em pixels do modelo) que ``RenderContext``.
+    A página tem o tamanho físico do modelo, pela resolução (dpi) gravada nele.
+    Só o subconjunto de glifos usado em cada arquivo é embutido.
+    """
+
+    def __init__(self, template_path, fields):
+        self.template_path = template_path
+        template = load_template(template_path)
+        self.width, self.height = template.size
+        dpi = template.info.get('dpi', (72, 72))[0] or 72
+        self.scale = 72 / dpi
+        self.template = encode_template(template)
+        self.fields = fields
+        self.font_names = {field.font_path: register_font(field.font_path)
+                           for field in fields if field.kind == 'text'}
+
+    def _draw_template(self, canvas):
+        # Equivalente a canvas.drawImage, mas com o XObject já comprimido em vez de recomprimir por arquivo
+        document = canvas._doc
+        reg_name = document.getXObjectName(TEMPLATE_XOBJECT)
+        if reg_name not in document.idToObject:
+            xobject = template_xobject((self.width, self.height), self.template)
+            canvas._setXObjects(xobject)
+            document.Reference(xobject, reg_name)
+            document.addForm(TEMPLATE_XOBJECT, xobject)
+        canvas._currentPageHasImages = 1
+        canvas.saveState()
+        canvas.scale(self.width, self.height)
+        canvas._code.append(f"/{reg_name} Do")
+        canvas.restoreState()
+        canvas._formsinuse.append(TEMPLATE_XOBJECT)
+
+    def _draw_qrcode(self, canvas, matrix, x, y, size):
+        module = size / len(matrix)
+        path = canvas.beginPath()
+        for row, dark_modules in enumerate(matrix):
+            for column, dark in enumerate(dark_modules):
+                if dark:
+                    path.rect(x + column * module, self.height - y - (row + 1) * module, module, module)
+        canvas.drawPath(path, stroke=0, fill=1)
+
+    def draw_page(self, canvas, values):
+        canvas.scale(self.scale, self.scale)
+        self._draw_template(canvas)
+        for field in self.fields:
+            text = field.value(values)
+            size, x = placement(field, text)
+            y = field.position[1]
+            canvas.setFillColorRGB(*(channel / 255 for channel in field.rgb()))
+            if field.kind == 'qrcode':
+                self._draw_qrcode(canvas, qr_matrix(text), x, y, size)
+                continue
+            # A linha de base fica uma "ascendente" abaixo da posição, como o draw.text do Pillow
+            ascent = load_font(field.font_path, size).getmetrics()[0]
+            canvas.setFont(self.font_names[field.font_path], size)
+            canvas.drawString(x, self.height - y - ascent, text)
+        canvas.showPage()
+
+    def new_canvas(self, output):
+        # invariant: o mesmo certificado gera sempre os mesmos bytes
+        return Canvas(output, pagesize=(self.width * self.scale, self.height * self.scale),
+                      pageCompression=1, invariant=1)
+
+    def render(self, values):
+        # Página desenhada, ainda sem gerar o arquivo (como a imagem do RenderContext)
+        buffer = io.BytesIO()
+        canvas = self.new_canvas(buffer)
+        self.draw_page(canvas, values)
+        return canvas, buffer
+
+    @staticmethod
+    def encode(page):
+        canvas, buffer = page
+        canvas.save()
+        return buffer.getvalue()
+
+    def render_pdf(self, values):
+        return self.encode(self.render(values))
+
+    def write_pages(self, output, rows, should_stop=None):
+        """Grava ``rows`` (valores de cada linha) em um único PDF, uma página por certificado; retorna as páginas."""
+        canvas = self.new_canvas(output)
+        pages = 0
+        for values in rows:
+            if should_stop and should_stop():
+                break
+            self.draw_page(canvas, values)
+            pages += 1
+        canvas.save()
+        return pages
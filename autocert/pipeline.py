@@ -0,0 +1,628 @@
+import io
+import os
+import re
+import time
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from queue import Queue
+from threading import Thread, Lock, BoundedSemaphore
+
+from autocert import cache as render_cache
+from autocert.journal import JobJournal, SendLog, RENDERED, SENT, FAILED, row_key
+from autocert.layout import check_columns, pad_certificate_number, row_values
+from autocert.metrics import BatchMetrics
+from autocert.ratelimit import DailyQuotaExceeded, RateLimiter, is_temporary_failure, retry_delay
+from autocert.render import create_render_context
+from autocert.spreadsheet import RecipientReader
+from autocert.validation import validate_recipients
+
+SendResult = namedtuple('SendResult', 'sent failed skipped retries quota_exceeded invalid')
+ExportResult = namedtuple('ExportResult', 'written failed stopped')
+
+# Nome dos arquivos exportados: pelo número do certificado ou pelo nome do participante
+EXPORT_NAMINGS = ('number', 'name')
+# Data fixa das entradas do ZIP: o mesmo lote gera sempre o mesmo arquivo
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Contexto de renderização de cada processo do pool (montado pelo initializer)
+_worker_context = None
+
+
+def safe_filename(text):
+    # Remove caracteres que não são aceitos em nomes de arquivo (Windows incluso)
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', str(text)).strip(' .') or '_'
+
+
+def create_certificate(context, name, certificate_number, output_name, timings=None, columns=None):
+    """Renderiza o certificado em memória; retorna ``(nome_do_arquivo, bytes_do_pdf)``.
+
+    ``columns`` são as demais colunas da linha, usadas pelos campos do layout.
+    Se ``timings`` for um dicionário, recebe a duração do desenho ('render') e
+    da geração do PDF ('encode'), em segundos.
+    """
+    start = time.perf_counter()
+    page = context.render(row_values(name, certificate_number, columns))
+    drawn = time.perf_counter()
+    data = context.encode(page)
+    if timings is not None:
+        timings['render'] = drawn - start
+        timings['encode'] = time.perf_counter() - drawn
+    return certificate_filename(output_name, name), data
+
+
+def certificate_filename(output_name, name):
+    return f"{safe_filename(f'{output_name}_{name}')}.pdf"
+
+
+def archive_certificate(archive_dir, filename, data, certificate_number):
+    """Grava uma cópia do PDF sem sobrescrever a de outro destinatário com o mesmo nome."""
+    stem = safe_filename(f"{os.path.splitext(filename)[0]}_{certificate_number}")
+    path = os.path.join(archive_dir, f"{stem}.pdf")
+    suffix = 1
+    while True:
+        try:
+            # 'x' falha se o arquivo já existir, inclusive entre processos concorrentes
+            with open(path, 'xb') as archive_file:
+                archive_file.write(data)
+            return path
+        except FileExistsError:
+            suffix += 1
+            path = os.path.join(archive_dir, f"{stem}_{suffix}.pdf")
+
+
+def certificate_attachment(certificate):
+    filename, data = certificate
+    attachment = io.BytesIO(data)
+    attachment.name = filename  # o yagmail usa o nome para o anexo e o tipo MIME
+    return attachment
+
+
+def send_email_generic(pool, name, email, certificate, subject, content):
+    try:
+        personalized_content = content.replace("{name}", name)
+        pool.send(to=email, subject=subject, contents=personalized_content,
+                  attachments=certificate_attachment(certificate))
+        print(f'Email enviado para {email} com sucesso!')
+    except Exception as e:
+        raise RuntimeError(f"Erro ao enviar email para {email}: {str(e)}") from e
+
+
+def _init_render_worker(backend, render_args):
+    global _worker_context
+    _worker_context = create_render_context(backend, render_args)
+
+
+def _store_in_cache(cache_path, data, timings):
+    start = time.perf_counter()
+    render_cache.store(cache_path, data)
+    timings['cache'] = time.perf_counter() - start
+
+
+def _render_in_worker(name, certificate_number, columns, output_name, archive_dir, cache_path=None):
+    # As durações voltam junto com o PDF: as métricas ficam no processo principal
+    timings = {}
+    certificate = create_certificate(_worker_context, name, certificate_number, output_name, timings, columns)
+    if cache_path:
+        _store_in_cache(cache_path, certificate[1], timings)
+    if archive_dir:
+        start = time.perf_counter()
+        archive_certificate(archive_dir, certificate[0], certificate[1], certificate_number)
+        timings['archive'] = time.perf_counter() - start
+    return certificate, timings
+
+
+def _export_in_worker(name, certificate_number, columns, path, cache_path=None):
+    # Cada processo grava o próprio PDF: os bytes não voltam para o processo principal
+    timings = {}
+    _, data = create_certificate(_worker_context, name, certificate_number, '', timings, columns)
+    if cache_path:
+        _store_in_cache(cache_path, data, timings)
+    start = time.perf_counter()
+    with open(path, 'wb') as output:
+        output.write(data)
+    timings['archive'] = time.perf_counter() - start
+    return timings
+
+
+def _sleep_unless(delay, stopped):
+    deadline = time.monotonic() + delay
+    while not stopped() and time.monotonic() < deadline:
+        time.sleep(min(0.2, deadline - time.monotonic()))
+
+
+def render_worker_count(job):
+    return job.render_workers or os.cpu_count() or 1
+
+
+def create_render_executor(job, font_index):
+    return ProcessPoolExecutor(max_workers=render_worker_count(job), initializer=_init_render_worker,
+                               initargs=(job.pdf_backend, job.render_args(font_index)))
+
+
+def _completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _cache_lookup(cache, metrics, recipient):
+    # Procura a linha no cache e conta o acerto ou a falta; a leitura entra na etapa 'cache'
+    start = time.perf_counter()
+    path, data = cache.lookup(row_values(recipient.name, recipient.certificate_number, recipient.columns))
+    metrics.observe('cache', time.perf_counter() - start)
+    metrics.increment('cache_hits' if data is not None else 'cache_misses')
+    return path, data
+
+
+def submit_render(executor, job, recipient, cache=None, metrics=None):
+    """Agenda a renderização da linha; retorna um Future de ``(certificado, durações)``.
+
+    Com ``cache``, um certificado já gerado vem do disco e o Future volta pronto,
+    sem passar pelo pool; os que faltam são gravados no cache pelo próprio processo.
+    """
+    cache_path = None
+    if cache:
+        cache_path, data = _cache_lookup(cache, metrics, recipient)
+        if data is not None:
+            certificate = (certificate_filename(job.output_name, recipient.name), data)
+            timings = {}
+            if job.archive_dir:
+                start = time.perf_counter()
+                archive_certificate(job.archive_dir, certificate[0], data, recipient.certificate_number)
+                timings['archive'] = time.perf_counter() - start
+            return _completed((certificate, timings))
+    return executor.submit(_render_in_worker, recipient.name, recipient.certificate_number, recipient.columns,
+                           job.output_name, job.archive_dir, cache_path)
+
+
+class BatchRun:
+    """Estado compartilhado de um lote, usado pelos dois motores de envio.
+
+    Guarda a leitura da planilha, o diário, o limitador de taxa e os
+    contadores, e concentra o que acontece com cada linha (pulada, enviada,
+    com erro) para que os motores só cuidem da concorrência.
+    """
+
+    def __init__(self, job, on_progress=None, on_error=None, should_stop=None, resume=False, metrics=None,
+                 cache=None, validation=None):
+        self.job = job
+        self.metrics = metrics or BatchMetrics()
+        self.cache = cache
+        # Linhas rejeitadas pela validação prévia: não são renderizadas nem enviadas
+        self.rejected = validation.rejected if validation else set()
+        self.normalized_emails = validation.normalized_emails if validation else {}
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.user_stop = should_stop or (lambda: False)
+        self.quota_errors = []
+        if job.archive_dir:
+            os.makedirs(job.archive_dir, exist_ok=True)
+        # Valida as colunas antes de qualquer trabalho; as linhas são lidas sob demanda
+        self.reader = RecipientReader(job.data_path)
+        try:
+            check_columns(job.layout(), self.reader.columns)
+        except ValueError:
+            self.reader.close()
+            raise
+        self.lock = Lock()
+        total = validation.total if validation else self.reader.total
+        self.counts = {'sent': 0, 'failed': 0, 'skipped': 0, 'invalid': 0, 'retries': 0, 'total': total}
+        self.metrics.set_total(total)
+        self.journal = JobJournal(job.journal_file())
+        # Envios da mesma conta nas últimas 24 h contam para o limite diário, de qualquer
+        # lote ou planilha: o registro de envios nunca é zerado, ao contrário do diário
+        self.send_log = SendLog(job.send_log_file())
+        sent_today = self.send_log.sent_since(job.sender_email, time.time() - 24 * 60 * 60)
+        if resume:
+            self.finished = self.journal.finished()
+        else:
+            self.journal.reset()
+            self.finished = set()
+        self.limiter = RateLimiter(job.rate_limit, job.daily_limit, max_concurrency=job.concurrency(),
+                                   sent_today=sent_today)
+
+    def should_stop(self):
+        return bool(self.quota_errors) or self.user_stop()
+
+    def recipients(self):
+        """Linhas ainda não enviadas, na ordem da planilha; fixa o total exato ao terminar."""
+        read = 0
+        rows = iter(self.reader)
+        try:
+            while True:
+                with self.metrics.timer('read'):
+                    recipient = next(rows, None)
+                if recipient is None:
+                    break
+                read += 1
+                if recipient.index in self.rejected:
+                    with self.lock:
+                        self.counts['invalid'] += 1
+                    self.metrics.increment('invalid')
+                    continue
+                if recipient.index in self.normalized_emails:
+                    recipient = recipient._replace(email=self.normalized_emails[recipient.index])
+                if row_key(recipient) in self.finished:
+                    with self.lock:
+                        self.counts['skipped'] += 1
+                    self.metrics.increment('skipped')
+                    continue
+                yield recipient
+            with self.lock:
+                self.counts['total'] = read  # agora o total é exato
+            self.metrics.set_total(read)
+        finally:
+            self.reader.close()
+
+    def submit_render(self, executor, recipient):
+        return submit_render(executor, self.job, recipient, self.cache, self.metrics)
+
+    def rendered(self, recipient, timings):
+        for stage, seconds in timings.items():
+            self.metrics.observe(stage, seconds)
+        self.journal.record(recipient, RENDERED)
+
+    def retried(self):
+        with self.lock:
+            self.counts['retries'] += 1
+        self.metrics.increment('retries')
+
+    def succeeded(self, recipient):
+        self.journal.record(recipient, SENT)
+        self.send_log.record(self.job.sender_email)
+        with self.lock:
+            self.counts['sent'] += 1
+            done = self.counts['sent'] + self.counts['failed'] + self.counts['skipped'] + self.counts['invalid']
+            total = self.counts['total']
+        self.metrics.increment('sent')
+        if self.on_progress:
+            self.on_progress(done, total)
+
+    def failed(self, recipient, error):
+        if isinstance(error, DailyQuotaExceeded):
+            # Não é falha da linha: ela continua pendente para a retomada
+            if not self.quota_errors and self.on_error:
+                self.on_error(recipient.email, error)
+            self.quota_errors.append(error)
+            return
+        self.journal.record(recipient, FAILED, error=error)
+        with self.lock:
+            self.counts['failed'] += 1
+            done = self.counts['sent'] + self.counts['failed'] + self.counts['skipped'] + self.counts['invalid']
+            total = self.counts['total']
+        self.metrics.increment('failed')
+        if self.on_error:
+            self.on_error(recipient.email, error)
+        if self.on_progress:
+            self.on_progress(done, total)
+
+    def close(self):
+        self.metrics.finish()
+        self.reader.close()
+        self.journal.close()
+        self.send_log.close()
+        if self.cache:
+            self.cache.prune()
+
+    def result(self):
+        return SendResult(self.counts['sent'], self.counts['failed'], self.counts['skipped'],
+                          self.counts['retries'], bool(self.quota_errors), self.counts['invalid'])
+
+
+def write_print_pdf(job, font_index, output_path, on_progress=None, should_stop=None):
+    """Grava todos os certificados da planilha em um único PDF (uma página cada), sem enviar e-mails.
+
+    Sempre usa o PDF vetorial: o modelo entra uma vez no arquivo e é
+    reaproveitado por todas as páginas. Retorna o número de páginas.
+    """
+    from autocert.pdf import VectorRenderContext
+    context = VectorRenderContext(*job.render_args(font_index))
+    reader = RecipientReader(job.data_path)
+    try:
+        check_columns(job.layout(), reader.columns)
+    except ValueError:
+        reader.close()
+        raise
+
+    def rows():
+        done = 0
+        for done, recipient in enumerate(reader, start=1):
+            yield row_values(recipient.name, recipient.certificate_number, recipient.columns)
+            if on_progress:
+                on_progress(done, reader.total)
+        if on_progress:
+            on_progress(done, reader.total)  # o total do xlsx era estimado: fecha em 100%
+
+    with open(output_path, 'wb') as output:
+        return context.write_pages(output, rows(), should_stop)
+
+
+def _submit_export(executor, recipient, path, cache=None, metrics=None):
+    # Como submit_render, mas o PDF vai direto para ``path``; do cache, só é copiado para lá
+    cache_path = None
+    if cache:
+        cache_path, data = _cache_lookup(cache, metrics, recipient)
+        if data is not None:
+            start = time.perf_counter()
+            with open(path, 'wb') as output:
+                output.write(data)
+            return _completed({'archive': time.perf_counter() - start})
+    return executor.submit(_export_in_worker, recipient.name, recipient.certificate_number, recipient.columns,
+                           path, cache_path)
+
+
+def export_filename(output_name, recipient, naming='number'):
+    """Nome do arquivo exportado, sem caracteres inválidos: ``certificado_0001.pdf`` ou ``certificado_Nome.pdf``."""
+    if naming == 'number':
+        key = pad_certificate_number(recipient.certificate_number)
+    else:
+        key = recipient.name
+    return f"{safe_filename(f'{output_name}_{key}')}.pdf"
+
+
+def unique_filename(filename, used):
+    # Repetidos ganham _2, _3... na ordem da planilha; compara sem caixa (Windows e macOS)
+    stem, extension = os.path.splitext(filename)
+    candidate, suffix = filename, 1
+    while candidate.lower() in used:
+        suffix += 1
+        candidate = f"{stem}_{suffix}{extension}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def export_certificates(job, font_index, destination, naming='number', on_progress=None, should_stop=None,
+                        metrics=None):
+    """Só gera os certificados, sem enviar e-mails, em uma pasta ou em um arquivo ``.zip``.
+
+    A renderização roda em paralelo no mesmo ProcessPoolExecutor do envio.
+    Em uma pasta, cada processo grava o próprio PDF; no ZIP, as entradas são
+    gravadas na ordem da planilha, sem compressão (o PDF já é comprimido), à
+    medida que ficam prontas. Só um número limitado de certificados fica
+    pendente, então a memória não cresce com o tamanho da planilha.
+
+    Os nomes dos arquivos vêm de ``export_filename`` (``naming`` é ``'number'``
+    ou ``'name'``) e são os mesmos a cada execução. Arquivos já existentes na
+    pasta são sobrescritos. Na pasta, um certificado com erro é contado e os
+    outros seguem; no ZIP, ele interrompe a exportação e o ZIP incompleto é
+    removido. As durações e a taxa (certificados/s) vão para ``metrics``.
+    Retorna um ``ExportResult``.
+    """
+    if naming not in EXPORT_NAMINGS:
+        raise ValueError(f"Nome de arquivo desconhecido: '{naming}' (use {' ou '.join(EXPORT_NAMINGS)}).")
+    metrics = metrics or BatchMetrics()
+    should_stop = should_stop or (lambda: False)
+    reader = RecipientReader(job.data_path)
+    try:
+        check_columns(job.layout(), reader.columns)
+    except ValueError:
+        reader.close()
+        raise
+    metrics.set_total(reader.total)
+    to_zip = destination.lower().endswith('.zip')
+    render_job = replace(job, archive_dir=None)
+    max_pending = render_worker_count(job) * 4
+    output = archive = cache = executor = None
+    pending = deque()
+    used = set()
+    counts = {'written': 0, 'failed': 0}
+
+    def collect():
+        # Espera o certificado mais antigo: no ZIP, as entradas saem na ordem da planilha
+        recipient, filename, future = pending.popleft()
+        try:
+            if archive:
+                (_, data), timings = future.result()
+                start = time.perf_counter()
+                entry = zipfile.ZipInfo(filename, date_time=ZIP_DATE_TIME)
+                entry.external_attr = 0o644 << 16
+                archive.writestr(entry, data)
+                timings['archive'] = time.perf_counter() - start
+            else:
+                timings = future.result()
+            for stage, seconds in timings.items():
+                metrics.observe(stage, seconds)
+            counts['written'] += 1
+            metrics.increment('exported')
+        except Exception as e:
+            counts['failed'] += 1
+            metrics.increment('failed')
+            if archive:
+                # Um ZIP sem algum certificado parece completo: interrompe e remove o arquivo
+                raise RuntimeError(f"Erro ao gerar o certificado de {recipient.name}: {str(e)}") from e
+            print(f"Erro ao gerar o certificado de {recipient.name}: {str(e)}")
+        if on_progress:
+            on_progress(counts['written'] + counts['failed'], metrics.total)
+
+    stopped = False
+    completed = False
+    try:
+        # Abertos dentro do try: se algo falhar no caminho, tudo é fechado e o ZIP incompleto removido
+        if to_zip:
+            output = open(destination, 'wb', buffering=1024 * 1024)
+            archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED)
+        else:
+            os.makedirs(destination, exist_ok=True)
+        cache = job.render_cache(font_index)
+        executor = create_render_executor(job, font_index)
+        rows = iter(reader)
+        read = 0
+        while True:
+            if should_stop():
+                stopped = True
+                break
+            with metrics.timer('read'):
+                recipient = next(rows, None)
+            if recipient is None:
+                metrics.set_total(read)  # agora o total é exato
+                break
+            read += 1
+            filename = unique_filename(export_filename(job.output_name, recipient, naming), used)
+            if archive:
+                future = submit_render(executor, render_job, recipient, cache, metrics)
+            else:
+                future = _submit_export(executor, recipient, os.path.join(destination, filename), cache, metrics)
+            pending.append((recipient, filename, future))
+            if len(pending) >= max_pending:
+                collect()
+        while pending and not stopped:
+            if should_stop():
+                stopped = True
+                break
+            collect()
+        if archive:
+            archive.close()  # grava o diretório central: só agora o ZIP é válido
+        completed = True
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        reader.close()
+        if output:
+            if not completed and archive:
+                try:
+                    archive.close()  # só libera o ZipFile; o arquivo incompleto é removido abaixo
+                except (OSError, ValueError):
+                    pass
+            output.close()
+            if not completed:
+                try:
+                    os.remove(destination)
+                except OSError:
+                    pass
+        if cache:
+            cache.prune()
+        metrics.finish()
+    return ExportResult(counts['written'], counts['failed'], stopped)
+
+
+def send_certificates(job, font_index, on_progress=None, on_error=None, should_stop=None, resume=False,
+                      metrics=None, validation=None):
+    """Gera e envia os certificados do lote; não depende de Tk.
+
+    A renderização (CPU) roda em um ProcessPoolExecutor; o envio (I/O) usa
+    ``job.threads`` threads ou, com ``job.engine == 'async'``, um event loop
+    asyncio com até ``job.max_in_flight`` mensagens em andamento, revezando-se
+    em ``job.threads`` conexões SMTP. Um número
+    limitado de certificados fica entre as duas etapas, então a memória não
+    cresce com o tamanho da planilha.
+
+    O envio passa por um ``RateLimiter`` (``job.rate_limit`` mensagens/s e
+    ``job.daily_limit`` por dia); falhas temporárias (4xx, quedas de conexão)
+    são tentadas de novo até ``job.max_retries`` vezes com espera exponencial.
+    Ao atingir o limite diário o lote para e pode ser retomado depois.
+
+    O estado de cada linha vai para o diário do lote (``job.journal_file()``).
+    Com ``resume=True`` as linhas já enviadas são puladas e só as que falharam
+    ou não chegaram a ser enviadas são processadas; sem ele o diário recomeça.
+
+    ``on_progress(done, total)`` e ``on_error(email, error)`` são chamados das
+    threads de envio; ``total`` é uma estimativa (ou ``None``) até a planilha
+    terminar de ser lida. Retorna um ``SendResult``.
+
+    As durações de cada etapa, os contadores e a taxa de envio vão para
+    ``metrics`` (um ``BatchMetrics``), que pode ser lido durante o lote para
+    mostrar taxa e ETA e exportado ao final.
+
+    Antes do lote a planilha passa por ``validate_recipients`` (ou use o
+    ``validation`` já calculado, para mostrar o relatório antes): linhas com
+    nome, email ou número inválidos ou repetidos não são renderizadas nem
+    enviadas, e aparecem em ``SendResult.invalid``.
+    """
+    metrics = metrics or BatchMetrics()
+    if validation is None:
+        validation = validate_recipients(job)
+    metrics.observe('validate', validation.elapsed)
+    batch = BatchRun(job, on_progress, on_error, should_stop, resume, metrics, job.render_cache(font_index),
+                     validation)
+    try:
+        if job.engine == 'async':
+            from autocert.async_send import run_async_engine
+            run_async_engine(batch, font_index)
+        else:
+            _run_threaded_engine(batch, font_index)
+    finally:
+        batch.close()
+    return batch.result()
+
+
+def _run_threaded_engine(batch, font_index):
+    job = batch.job
+    max_pending = (render_worker_count(job) + job.threads) * 2
+    slots = BoundedSemaphore(max_pending)
+    rendered = Queue()
+    feeder_errors = []
+
+    # Conexões SMTP compartilhadas: um login por conexão, não por certificado
+    from autocert.smtp import SMTPConnectionPool  # importa o yagmail só quando há envio
+    pool = SMTPConnectionPool(job.sender_email, job.sender_password, size=job.threads,
+                              metrics=batch.metrics, **job.smtp_kwargs())
+    executor = create_render_executor(job, font_index)
+
+    def feeder():
+        # Enfileira na ordem da planilha; bloqueia quando há certificados demais pendentes
+        try:
+            for recipient in batch.recipients():
+                slots.acquire()
+                if batch.should_stop():
+                    slots.release()
+                    break
+                rendered.put((recipient, batch.submit_render(executor, recipient)))
+        except Exception as e:
+            feeder_errors.append(e)
+        finally:
+            for _ in range(job.threads):
+                rendered.put(None)
+
+    def send_with_retries(recipient, certificate):
+        # Retorna False se o envio foi interrompido antes de acontecer
+        attempt = 0
+        while True:
+            if not batch.limiter.acquire(batch.should_stop):
+                return False
+            try:
+                send_email_generic(pool, recipient.name, recipient.email, certificate, job.subject, job.content)
+            except Exception as e:
+                temporary = is_temporary_failure(e)
+                batch.limiter.release(sent=False, temporary_failure=temporary)
+                if not temporary or attempt >= job.max_retries:
+                    raise
+                batch.retried()
+                _sleep_unless(retry_delay(attempt), batch.should_stop)
+                attempt += 1
+                continue
+            batch.limiter.release(sent=True)
+            return True
+
+    def sender():
+        while True:
+            item = rendered.get()
+            if item is None:
+                return
+            recipient, future = item
+            try:
+                if batch.should_stop():
+                    future.cancel()
+                    continue
+                certificate, timings = future.result()
+                batch.rendered(recipient, timings)
+                if send_with_retries(recipient, certificate):
+                    batch.succeeded(recipient)
+            except Exception as e:
+                batch.failed(recipient, e)
+            finally:
+                slots.release()
+
+    threads = [Thread(target=feeder, daemon=True)]
+    threads += [Thread(target=sender, daemon=True) for _ in range(job.threads)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        pool.close()
+    if feeder_errors:
+        raise feeder_errors[0]
@@ -0,0 +1,63 @@
+import os
+from threading import Thread, Condition
+
+from PIL import Image, ImageDraw
+
+from autocert.layout import NAME_COLUMN, NUMBER_COLUMN, SampleValues, resolve_fonts
+from autocert.render import draw_fields, load_template
+
+
+class PreviewRenderer:
+    """Pré-visualização fora da thread do Tk, com a versão mais recente vencendo.
+
+    Os pedidos que chegam enquanto uma imagem está sendo desenhada são
+    descartados, exceto o último. O modelo é reduzido ao tamanho da tela uma
+    vez e reaproveitado; o texto é desenhado já na escala reduzida.
+    ``deliver(image)`` e ``on_error(error)`` são chamados da thread de trabalho.
+    """
+
+    def __init__(self, font_index, deliver, on_error=None):
+        self.font_index = font_index
+        self.deliver = deliver
+        self.on_error = on_error
+        self._pending = None
+        self._condition = Condition()
+        self._display_key = None
+        self._display_template = None
+        Thread(target=self._run, daemon=True).start()
+
+    def request(self, job, size):
+        with self._condition:
+            self._pending = (job, size)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                job, size = self._pending
+                self._pending = None
+            try:
+                self.deliver(self.render(job, size))
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+    def display_template(self, template_path, size):
+        template = load_template(template_path)
+        scale = min(size[0] / template.width, size[1] / template.height, 1)
+        display_size = (max(1, int(template.width * scale)), max(1, int(template.height * scale)))
+        key = (template_path, os.path.getmtime(template_path), display_size)
+        if key != self._display_key:
+            self._display_template = template.resize(display_size, Image.LANCZOS)
+            self._display_key = key
+        return self._display_template, scale
+
+    def render(self, job, size):
+        template, scale = self.display_template(job.template_path, size)
+        fields = resolve_fonts(job.layout(), self.font_index, job.font_name)
+        image = template.copy()
+        values = SampleValues({NAME_COLUMN: "Pré-visualização", NUMBER_COLUMN: "0000"})
+        draw_fields(ImageDraw.Draw(image), fields, values, scale)
+        return image
@@ -0,0 +1,172 @@
+import asyncio
+import random
+import smtplib
+import time
+from threading import Condition
+
+
+class DailyQuotaExceeded(RuntimeError):
+    pass
+
+
+def _is_aiosmtplib_error(error):
+    # Sem importar o aiosmtplib: ele só é necessário no motor assíncrono
+    return type(error).__module__.startswith('aiosmtplib')
+
+
+def is_temporary_failure(error):
+    """Falhas 4xx e quedas de conexão: vale a pena tentar de novo mais tarde."""
+    while error is not None:
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        if _is_aiosmtplib_error(error):
+            if isinstance(getattr(error, 'recipients', None), list):
+                return all(400 <= recipient.code < 500 for recipient in error.recipients)
+            if isinstance(getattr(error, 'code', None), int) and not isinstance(error, (ConnectionError, TimeoutError)):
+                return 400 <= error.code < 500
+        if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+            return True
+        error = error.__cause__
+    return False
+
+
+def retry_delay(attempt, base=2.0, maximum=300.0):
+    # Espera exponencial com jitter, para as threads não voltarem todas juntas
+    return min(maximum, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class RateLimiter:
+    """Token bucket (mensagens/s e mensagens/dia) com concorrência adaptativa.
+
+    A cada falha temporária a taxa cai pela metade e o número de envios
+    simultâneos diminui em um; depois de ``recovery_after`` sucessos seguidos
+    ambos voltam a subir gradualmente até os limites configurados.
+    """
+
+    def __init__(self, rate=None, per_day=None, max_concurrency=5, sent_today=0, recovery_after=20):
+        self.max_rate = rate
+        self.rate = rate
+        self.per_day = per_day
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.recovery_after = recovery_after
+        self.sent_today = sent_today
+        self.in_flight = 0
+        self.backoffs = 0
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._successes = 0
+        self._condition = Condition()
+        # Do motor async: as tarefas esperam nesta condição, acordadas por release/set_concurrency
+        self._loop = None
+        self._async_condition = None
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            # Permite uma pequena rajada (1 s de tokens), nunca mais que isso
+            self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self):
+        # Reserva token e vaga se possível; senão, retorna quanto tempo esperar
+        if self.per_day is not None and self.sent_today + self.in_flight >= self.per_day:
+            raise DailyQuotaExceeded(f"Limite diário de {self.per_day} mensagens atingido.")
+        self._refill()
+        if self.rate and self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        if self.in_flight >= self.concurrency:
+            return None  # só uma vaga liberada resolve
+        if self.rate:
+            self._tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    def acquire(self, should_stop=None):
+        """Espera um token e uma vaga de envio; retorna False se o envio foi interrompido."""
+        with self._condition:
+            while True:
+                if should_stop and should_stop():
+                    return False
+                wait = self._try_acquire()
+                if wait == 0:
+                    return True
+                self._condition.wait(0.5 if wait is None else min(0.5, wait))
+
+    async def acquire_async(self, should_stop=None):
+        """Versão para asyncio de ``acquire``: espera sem bloquear o event loop.
+
+        Sem vaga, a tarefa dorme em uma ``asyncio.Condition`` até um ``release`` ou
+        ``set_concurrency`` liberar espaço, em vez de verificar a cada poucos ms.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._async_condition = loop, asyncio.Condition()
+        condition = self._async_condition
+        async with condition:
+            while True:
+                if should_stop and should_stop():
+                    return False
+                with self._condition:
+                    wait = self._try_acquire()
+                if wait == 0:
+                    return True
+                try:
+                    # O tempo limite cobre a espera por token e a verificação de parada
+                    await asyncio.wait_for(condition.wait(), 0.5 if wait is None else min(0.5, wait))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _notify_async(self, count):
+        async with self._async_condition:
+            if count is None:
+                self._async_condition.notify_all()
+            else:
+                self._async_condition.notify(count)
+
+    def _wake_async(self, count=1):
+        # release roda na thread do event loop (motor async) ou nas threads de envio
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(self._notify_async(count))
+        else:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._notify_async(count)))
+
+    def set_concurrency(self, concurrency):
+        """Muda o número de envios simultâneos (entre 1 e ``max_concurrency``) e acorda quem espera vaga."""
+        with self._condition:
+            self.concurrency = max(1, min(self.max_concurrency, concurrency))
+            self._condition.notify_all()
+        self._wake_async(None)
+
+    def release(self, sent, temporary_failure=False):
+        concurrency = None
+        with self._condition:
+            self.in_flight -= 1
+            if sent:
+                self.sent_today += 1
+                self._successes += 1
+                if self._successes >= self.recovery_after:
+                    self._successes = 0
+                    concurrency = self.concurrency + 1
+                    if self.max_rate:
+                        self.rate = min(self.max_rate, self.rate * 1.25)
+            elif temporary_failure:
+                self._successes = 0
+                self.backoffs += 1
+                concurrency = self.concurrency - 1
+                if self.rate:
+                    self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._condition.notify_all()
+        if concurrency is None:
+            self._wake_async()  # uma vaga liberada: basta acordar uma tarefa
+        else:
+            self.set_concurrency(concurrency)
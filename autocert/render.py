@@ -0,0 +1,76 @@
+import io
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from autocert.fonts import load_font
+from autocert.layout import placement, qr_matrix
+
+
+@lru_cache(maxsize=4)
+def _decode_template(template_path, mtime):
+    image = Image.open(template_path)
+    image.load()
+    return image
+
+
+def load_template(template_path):
+    """Modelo decodificado uma única vez; é recarregado se o arquivo mudar."""
+    return _decode_template(template_path, os.path.getmtime(template_path))
+
+
+def draw_fields(draw, fields, values, scale=1.0):
+    """Desenha os campos com o ImageDraw do Pillow; ``scale`` reduz tudo (pré-visualização)."""
+    for field in fields:
+        text = field.value(values)
+        size, x = placement(field, text)
+        y = field.position[1]
+        if field.kind == 'qrcode':
+            matrix = qr_matrix(text)
+            module = size / len(matrix) * scale
+            for row, dark_modules in enumerate(matrix):
+                for column, dark in enumerate(dark_modules):
+                    if dark:
+                        left, top = x * scale + column * module, y * scale + row * module
+                        draw.rectangle((left, top, left + module, top + module), fill=field.rgb())
+            continue
+        font = load_font(field.font_path, max(1, round(size * scale)))
+        draw.text((x * scale, y * scale), text, font=font, fill=field.rgb())
+
+
+class RenderContext:
+    """Tudo que é igual para o lote inteiro: o modelo decodificado e os campos com as fontes resolvidas.
+
+    É montado uma vez por execução; cada linha só copia o modelo e desenha os campos.
+    """
+
+    def __init__(self, template_path, fields):
+        self.template_path = template_path
+        self.template = load_template(template_path)
+        self.fields = fields
+
+    def render(self, values):
+        image = self.template.copy()
+        draw_fields(ImageDraw.Draw(image), self.fields, values)
+        return image
+
+    @staticmethod
+    def encode(image):
+        # Caminho rasterizado: a página inteira vira uma imagem dentro do PDF
+        buffer = io.BytesIO()
+        image.save(buffer, format='PDF')
+        return buffer.getvalue()
+
+    def render_pdf(self, values):
+        return self.encode(self.render(values))
+
+
+def create_render_context(backend, render_args):
+    """``RenderContext`` (raster) ou ``VectorRenderContext`` (vetorial, requer reportlab)."""
+    if backend == 'raster':
+        return RenderContext(*render_args)
+    if backend == 'vector':
+        from autocert.pdf import VectorRenderContext
+        return VectorRenderContext(*render_args)
+    raise ValueError(f"Formato de PDF desconhecido: '{backend}' (use vector ou raster).")
@@ -0,0 +1,113 @@
+import smtplib
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from threading import Lock
+
+import yagmail
+
+from autocert.metrics import BatchMetrics
+
+
+class SMTPConnectionPool:
+    """Pool limitado de conexões SMTP persistentes compartilhado pelas threads de envio.
+
+    Cada conexão faz o handshake (TCP, TLS e AUTH) uma única vez e é reutilizada
+    para várias mensagens. Se o servidor desconectar ou responder 421, a conexão
+    é refeita e o envio é tentado novamente. O tempo de conexão e de cada envio
+    vai para ``metrics`` (etapas 'smtp_connect' e 'smtp_send').
+    """
+
+    # Códigos SMTP que indicam que a conexão deve ser descartada e refeita
+    RECONNECT_CODES = (421,)
+
+    def __init__(self, user, password, size=5, metrics=None, **smtp_kwargs):
+        self.user = user
+        self.password = password
+        self.metrics = metrics or BatchMetrics()
+        self.size = size
+        self.smtp_kwargs = smtp_kwargs
+        self._idle = LifoQueue()
+        self._created = 0
+        self._all = []
+        self._lock = Lock()
+        self._closed = False
+
+    def _new_client(self):
+        client = yagmail.SMTP(user=self.user, password=self.password, **self.smtp_kwargs)
+        with self.metrics.timer('smtp_connect'):
+            client.login()
+        return client
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("Pool de conexões SMTP já foi fechado.")
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            # Todas as conexões estão em uso: espera uma ser devolvida
+            return self._idle.get()
+        try:
+            client = self._new_client()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._all.append(client)
+        return client
+
+    def _release(self, client):
+        self._idle.put(client)
+
+    @contextmanager
+    def connection(self):
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._release(client)
+
+    def _reconnect(self, client):
+        client.close()
+        with self.metrics.timer('smtp_connect'):
+            client.login()
+
+    def _needs_reconnect(self, error):
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code in self.RECONNECT_CODES
+
+    def send(self, to, subject, contents, attachments=None):
+        with self.connection() as client:
+            recipients, message = client.prepare_send(to=to, subject=subject, contents=contents,
+                                                      attachments=attachments)
+            try:
+                with self.metrics.timer('smtp_send'):
+                    return client.smtp.sendmail(client.user, recipients, message)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException) as e:
+                if not self._needs_reconnect(e):
+                    raise
+            # A conexão caiu: refaz o login e tenta mais uma vez
+            self._reconnect(client)
+            with self.metrics.timer('smtp_send'):
+                return client.smtp.sendmail(client.user, recipients, message)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            clients, self._all = self._all, []
+        for client in clients:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
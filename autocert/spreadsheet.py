@@ -0,0 +1,152 @@
+import codecs
+import csv
+import datetime
+import math
+import os
+from collections import namedtuple
+
+REQUIRED_COLUMNS = ('Nome', 'Email', 'Numero do Certificado')
+
+# ``columns``: todas as colunas da linha (cabeçalho -> texto), para os campos do layout;
+# ``line``: linha na planilha (o cabeçalho é a linha 1), para os relatórios
+Recipient = namedtuple('Recipient', 'index name email certificate_number columns line')
+
+
+def _clean_number(value):
+    # O Excel guarda números como float; 1234.0 deve virar "1234" no certificado
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None  # "NaN" de planilhas geradas por outros programas: célula vazia
+        if value.is_integer():
+            return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _clean_text(value):
+    # Espaços nas pontas (comuns em emails colados de outros lugares) não fazem parte do valor
+    return value.strip() if isinstance(value, str) else value
+
+
+def _cell_text(value):
+    # Texto de uma célula para os campos do certificado; datas no formato brasileiro
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%d/%m/%Y' if value.time() == datetime.time() else '%d/%m/%Y %H:%M')
+    if isinstance(value, datetime.date):
+        return value.strftime('%d/%m/%Y')
+    value = _clean_number(value)
+    return '' if value is None else str(value)
+
+
+def csv_encoding(path):
+    """``'utf-8-sig'`` se o arquivo inteiro for UTF-8 válido; senão ``'cp1252'``.
+
+    O Excel em português exporta CSV em cp1252 (Windows-1252). O arquivo todo é
+    conferido antes da leitura: um "João" no meio da planilha não pode
+    interromper um lote já em andamento.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as source:
+        try:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+class RecipientReader:
+    """Lê a planilha (.xlsx ou .csv) linha a linha, sem carregar o arquivo inteiro.
+
+    O cabeçalho é validado já no construtor; as linhas são produzidas sob
+    demanda como tuplas ``Recipient``. ``total`` é uma estimativa do número de
+    linhas quando o formato informa (xlsx; inclui linhas em branco ou só
+    formatadas no fim) ou ``None``, e vira o número exato de linhas produzidas
+    quando a leitura chega ao fim; ``columns`` são os nomes do cabeçalho.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.total = None
+        self._workbook = None
+        self._file = None
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            self._rows = self._open_csv()
+        elif extension in ('.xlsx', '.xlsm'):
+            self._rows = self._open_xlsx()
+        else:
+            raise ValueError(f"Formato de planilha não suportado: '{extension}' (use .xlsx ou .csv).")
+        try:
+            header = next(self._rows)
+        except StopIteration:
+            self.close()
+            raise ValueError("A planilha está vazia.")
+        self._columns = self._map_columns(header)
+
+    def _open_xlsx(self):
+        import openpyxl
+        self._workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        sheet = self._workbook.active
+        if sheet.max_row:
+            self.total = max(sheet.max_row - 1, 0)  # estimativa, corrigida ao fim da leitura
+        return sheet.iter_rows(values_only=True)
+
+    def _open_csv(self):
+        # O UTF-8 já foi conferido; no cp1252, os poucos bytes indefinidos viram '\ufffd' em vez de erro
+        self._file = open(self.path, newline='', encoding=csv_encoding(self.path), errors='replace')
+        sample = self._file.read(4096)
+        self._file.seek(0)
+        try:
+            # Planilhas exportadas do Excel em português costumam usar ';'
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        return csv.reader(self._file, dialect)
+
+    def _map_columns(self, header):
+        header = [str(cell).strip() if cell is not None else '' for cell in header]
+        self.columns = [column for column in header if column]
+        self._header = header
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            self.close()
+            raise ValueError(f"Colunas obrigatórias ausentes na planilha: {', '.join(missing)}")
+        return [header.index(column) for column in REQUIRED_COLUMNS]
+
+    def __iter__(self):
+        name_col, email_col, number_col = self._columns
+        width = max(self._columns) + 1
+        index = 0
+        try:
+            for line, row in enumerate(self._rows, start=2):
+                if not any(cell not in (None, '') for cell in row):
+                    continue  # linhas em branco (comuns no fim de arquivos xlsx)
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                columns = {column: _cell_text(cell) for column, cell in zip(self._header, row) if column}
+                yield Recipient(index, _clean_text(row[name_col]), _clean_text(row[email_col]),
+                                _clean_number(row[number_col]), columns, line)
+                index += 1
+            self.total = index  # linhas em branco não contam: agora o total é exato
+        finally:
+            self.close()
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -0,0 +1,248 @@
+import csv
+import re
+import socket
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from autocert.layout import pad_certificate_number
+from autocert.spreadsheet import RecipientReader
+
+# Sintaxe prática de endereço: a parte local sem espaços e o domínio com TLD de letras
+LOCAL_PART = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+DOMAIN = re.compile(r"^(?=.{1,253}$)([A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}$")
+# Número inteiro, com ou sem ".0" no fim
+INTEGER = re.compile(r"^[0-9]+(\.0+)?$")
+
+# Motivos de rejeição, como aparecem no relatório
+EMPTY_NAME = 'nome vazio'
+EMPTY_EMAIL = 'email vazio'
+INVALID_EMAIL = 'email inválido'
+NO_MAIL_DOMAIN = 'domínio não recebe emails'
+EMPTY_NUMBER = 'número do certificado vazio'
+DUPLICATE_NUMBER = 'número do certificado repetido'
+DUPLICATE_EMAIL = 'email repetido'
+
+# ``detail``: complemento do motivo, como a linha da primeira ocorrência de um repetido
+Issue = namedtuple('Issue', 'index line name email reason detail')
+
+
+def normalize_email(email):
+    """Email sem espaços nas pontas, com o domínio em minúsculas e em ASCII (domínios acentuados
+    viram ``xn--``), ou ``None`` se inválido.
+
+    É o endereço usado no envio: o SMTP não aceita domínios acentuados como foram digitados.
+    """
+    if not isinstance(email, str):
+        return None
+    email = email.strip()
+    if len(email) > 254 or email.count('@') != 1:
+        return None
+    local, domain = email.split('@')
+    if not local or len(local) > 64 or not LOCAL_PART.match(local):
+        return None
+    domain = _ascii_domain(domain)
+    return f"{local}@{domain}" if domain else None
+
+
+@lru_cache(maxsize=4096)
+def _ascii_domain(domain):
+    # Poucos domínios se repetem em milhares de linhas: converte e valida cada um uma vez
+    try:
+        domain = domain.encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return None
+    return domain if DOMAIN.match(domain) else None
+
+
+def number_key(certificate_number):
+    # Chave para achar repetidos: 1, 1.0, "01" e "0001" são o mesmo certificado
+    text = str(certificate_number)
+    if INTEGER.match(text):  # "1.0" vem de CSVs exportados com os números como float
+        text = str(int(text.split('.')[0]))
+    return pad_certificate_number(text).upper()
+
+
+def resolve_mail_domain(domain):
+    """Resolvedor padrão: ``True`` se o domínio recebe email, ``False`` se não existe, ``None`` se não deu para saber.
+
+    Só o dnspython (opcional) dá uma resposta definitiva, pelo registro MX. Sem
+    ele, a resolução de nomes do sistema só confirma domínios com endereço: um
+    domínio só com MX (comum em subdomínios de instituições) não tem endereço e
+    mesmo assim recebe email, então a falta de resposta vira "desconhecido".
+    """
+    try:
+        import dns.exception
+        import dns.resolver
+    except ImportError:
+        try:
+            socket.getaddrinfo(domain, None)
+            return True
+        except OSError:
+            return None
+    try:
+        dns.resolver.resolve(domain, 'MX')
+        return True
+    except dns.resolver.NXDOMAIN:
+        return False
+    except dns.resolver.NoAnswer:
+        # Sem MX, o email vai para o endereço do próprio domínio (RFC 5321)
+        for record in ('A', 'AAAA'):
+            try:
+                dns.resolver.resolve(domain, record)
+                return True
+            except dns.resolver.NoAnswer:
+                continue
+            except dns.exception.DNSException:
+                return None
+        return False
+    except dns.exception.DNSException:
+        return None
+
+
+class DomainChecker:
+    """Verifica se os domínios recebem email, com uma consulta por domínio e em paralelo.
+
+    ``resolver(domain)`` devolve ``True``, ``False`` ou ``None`` (desconhecido: o
+    email não é rejeitado); troque-o por uma função local (por exemplo, o ``get`` de
+    um dicionário) para validar sem acesso à rede. As respostas ficam em cache
+    enquanto o objeto existir.
+
+    Um "não existe" só vale se o DNS estiver respondendo: se nenhum domínio da
+    planilha for encontrado, ``canary`` (um domínio que certamente recebe email)
+    é consultado, e se ele também falhar as respostas viram "desconhecido". Sem
+    rede, ou atrás de um DNS que responde "não existe" para tudo, nada é rejeitado.
+    Use ``canary=None`` para confiar sempre no resolvedor.
+    """
+
+    def __init__(self, resolver=None, max_workers=16, canary='gmail.com'):
+        self.resolver = resolver or resolve_mail_domain
+        self.max_workers = max_workers
+        self.canary = canary
+        self.cache = {}
+
+    def _resolve(self, domain):
+        try:
+            return self.resolver(domain)
+        except Exception:
+            return None  # falha do resolvedor não é motivo para descartar a linha
+
+    def check(self, domains):
+        """``{domínio: True/False/None}`` para todos os ``domains``, consultando só os que não estão em cache."""
+        pending = sorted(set(domains) - self.cache.keys())
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                answers = dict(zip(pending, executor.map(self._resolve, pending)))
+            if False in answers.values() and not self._dns_works(answers):
+                answers = {domain: None if accepts_mail is False else accepts_mail
+                           for domain, accepts_mail in answers.items()}
+            self.cache.update(answers)
+        return {domain: self.cache[domain] for domain in domains}
+
+    def _dns_works(self, answers):
+        if not self.canary or True in answers.values() or True in self.cache.values():
+            return True
+        if self.canary not in self.cache:
+            self.cache[self.canary] = self._resolve(self.canary)
+        return self.cache[self.canary] is True
+
+
+class ValidationReport:
+    """Resultado da validação prévia: as linhas rejeitadas e o motivo de cada uma."""
+
+    def __init__(self):
+        self.total = 0
+        self.issues = []
+        self.rejected = set()  # ``Recipient.index`` das linhas que não vão para o lote
+        self.normalized_emails = {}  # ``Recipient.index`` -> email normalizado, só os que mudaram
+        self.domains_checked = 0
+        self.elapsed = 0.0
+
+    @property
+    def valid(self):
+        return self.total - len(self.rejected)
+
+    def reject(self, recipient, reason, detail=''):
+        self.issues.append(Issue(recipient.index, recipient.line, recipient.name, recipient.email, reason, detail))
+        self.rejected.add(recipient.index)
+
+    def counts(self):
+        return Counter(issue.reason for issue in self.issues)
+
+    def text(self, limit=50):
+        """Resumo legível, com até ``limit`` linhas rejeitadas."""
+        lines = [f"{self.total} linhas na planilha: {self.valid} prontas para envio, {len(self.rejected)} rejeitadas."]
+        if self.domains_checked:
+            lines.append(f"{self.domains_checked} domínios verificados.")
+        if self.normalized_emails:
+            lines.append(f"{len(self.normalized_emails)} emails com domínio acentuado convertidos para envio.")
+        for reason, count in self.counts().most_common():
+            lines.append(f"  {reason}: {count}")
+        for issue in sorted(self.issues, key=lambda issue: issue.line)[:limit]:
+            detail = f" ({issue.detail})" if issue.detail else ''
+            lines.append(f"  linha {issue.line}: {issue.reason}{detail} - {issue.name or ''} <{issue.email or ''}>")
+        if len(self.issues) > limit:
+            lines.append(f"  ... e mais {len(self.issues) - limit}.")
+        return '\n'.join(lines)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8-sig') as output:
+            writer = csv.writer(output)
+            writer.writerow(('Linha', 'Nome', 'Email', 'Motivo', 'Detalhe'))
+            for issue in sorted(self.issues, key=lambda issue: issue.line):
+                writer.writerow((issue.line, issue.name, issue.email, issue.reason, issue.detail))
+
+
+def validate_recipients(job, domain_checker=None):
+    """Valida a planilha inteira antes do envio; retorna um ``ValidationReport``.
+
+    Uma única passada guarda só as chaves de cada linha: nome e número vazios,
+    sintaxe do email e repetidos (mesmo número, ou mesmo email se
+    ``job.allow_duplicate_emails`` for falso; a primeira ocorrência fica). Com
+    ``job.check_domains``, cada domínio distinto é consultado uma vez no
+    ``domain_checker`` (por padrão, um ``DomainChecker`` com o DNS do sistema).
+    """
+    start = time.perf_counter()
+    report = ValidationReport()
+    seen_numbers, seen_emails = {}, {}
+    by_domain = {}  # domínio -> linhas ainda válidas que dependem dele
+    with RecipientReader(job.data_path) as reader:
+        for recipient in reader:
+            report.total += 1
+            if recipient.name in (None, ''):
+                report.reject(recipient, EMPTY_NAME)
+                continue
+            if recipient.email in (None, ''):
+                report.reject(recipient, EMPTY_EMAIL)
+                continue
+            email = normalize_email(recipient.email)
+            if email is None:
+                report.reject(recipient, INVALID_EMAIL)
+                continue
+            if recipient.certificate_number in (None, '') or str(recipient.certificate_number).lower() == 'nan':
+                report.reject(recipient, EMPTY_NUMBER)
+                continue
+            number = number_key(recipient.certificate_number)
+            if number in seen_numbers:
+                report.reject(recipient, DUPLICATE_NUMBER, f"igual à linha {seen_numbers[number]}")
+                continue
+            email_key = email.lower()
+            if email_key in seen_emails and not job.allow_duplicate_emails:
+                report.reject(recipient, DUPLICATE_EMAIL, f"igual à linha {seen_emails[email_key]}")
+                continue
+            seen_numbers[number] = recipient.line
+            seen_emails.setdefault(email_key, recipient.line)
+            if email != recipient.email:
+                report.normalized_emails[recipient.index] = email
+            by_domain.setdefault(email.split('@')[1], []).append(recipient._replace(columns=None))
+    if job.check_domains and by_domain:
+        answers = (domain_checker or DomainChecker()).check(by_domain)
+        report.domains_checked = len(answers)
+        for domain, accepts_mail in answers.items():
+            if accepts_mail is False:
+                for recipient in by_domain[domain]:
+                    report.reject(recipient, NO_MAIL_DOMAIN, domain)
+                    report.normalized_emails.pop(recipient.index, None)
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -0,0 +1,52 @@
+"""Tempo por atualização da pré-visualização em um modelo 4K (meta: < 16 ms).
+
+Uso: python -m benchmarks.bench_preview [--updates N] [--font CAMINHO]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from autocert.fonts import FontIndex
+from autocert.job import CertificateJob
+from autocert.preview import PreviewRenderer
+from benchmarks.bench_render import TEMPLATE
+from benchmarks.fonts import find_any_font
+
+CANVAS_SIZE = (960, 680)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+    font_path = args.font or find_any_font()
+    font_index = FontIndex([os.path.dirname(font_path)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_4k = os.path.join(tmp, "template_4k.png")
+        Image.open(TEMPLATE).resize((3840, 2715)).save(template_4k)
+        job = CertificateJob(template_4k, None, font_name=os.path.splitext(os.path.basename(font_path))[0])
+        # deliver não é usado: o benchmark chama render() diretamente, como a thread faria
+        renderer = PreviewRenderer(font_index, deliver=lambda image: None)
+        renderer.render(job, CANVAS_SIZE)  # aquecimento: reduz o modelo e carrega as fontes
+
+        timings = []
+        for update in range(args.updates):
+            # Simula a digitação de coordenadas: a posição muda a cada atualização
+            job = CertificateJob(job.template_path, None, font_name=job.font_name,
+                                 name_position=(200 + update, 1340))
+            start = time.perf_counter()
+            renderer.render(job, CANVAS_SIZE)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"modelo 3840x2715 -> canvas {CANVAS_SIZE[0]}x{CANVAS_SIZE[1]}, {args.updates} atualizações")
+    print(f"mediana {timings[len(timings) // 2]:.2f} ms, p95 {timings[int(len(timings) * 0.95)]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Envio completo contra um SMTP local que recusa parte das mensagens com 4xx.
+
+Mostra quantas mensagens chegaram, quantas novas tentativas foram feitas e a
+taxa efetiva com o RateLimiter. Uso:
+python -m benchmarks.bench_rate_limit [--rows N] [--failure-rate F] [--rate R] [--threads T] [--engine async]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from autocert.fonts import FontIndex
+from autocert.job import CertificateJob
+from autocert.pipeline import send_certificates
+from benchmarks.fonts import find_any_font
+from benchmarks.smtp_sink import FlakyHandler, SMTPSink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=None, help="mensagens/s (padrão: sem limite)")
+    parser.add_argument("--threads", type=int, default=5)
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--engine", choices=("threads", "async"), default="threads")
+    args = parser.parse_args()
+    font_path = find_any_font()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Modelo pequeno: o objetivo aqui é medir o envio, não a renderização
+        template = os.path.join(tmp, "modelo.png")
+        Image.new("RGB", (400, 200), "white").save(template)
+        data = os.path.join(tmp, "destinatarios.csv")
+        with open(data, "w", newline="", encoding="utf-8") as data_file:
+            writer = csv.writer(data_file)
+            writer.writerow(["Nome", "Email", "Numero do Certificado"])
+            for index in range(args.rows):
+                writer.writerow([f"Participante {index}", f"p{index}@example.com", index])
+
+        with SMTPSink(FlakyHandler(args.failure_rate, seed=1)) as sink:
+            job = CertificateJob(
+                template, data, font_name=os.path.splitext(os.path.basename(font_path))[0],
+                font_size=20, name_position=(10, 10), cert_font_size=12, cert_position=(10, 60),
+                sender_email="bench@example.com", sender_password="senha",
+                smtp_host="127.0.0.1", smtp_port=sink.port, smtp_ssl=False, smtp_starttls=False,
+                threads=args.threads, max_in_flight=args.threads, engine=args.engine, render_workers=1, rate_limit=args.rate, max_retries=args.max_retries,
+                send_log_path=os.path.join(tmp, "envios.sqlite"),  # fora do registro real do usuário
+            )
+            start = time.perf_counter()
+            result = send_certificates(job, FontIndex([os.path.dirname(font_path)]))
+            elapsed = time.perf_counter() - start
+
+    print(f"{result.sent} enviados, {result.failed} falharam, {result.retries} novas tentativas, "
+          f"{sink.handler.rejected} recusas 4xx do servidor")
+    print(f"{elapsed:.2f}s -> {result.sent / elapsed:.1f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Certificados renderizados por segundo no Template.png: modelo/fontes por linha vs. RenderContext.
+
+Com --pdf a medição inclui a geração do PDF, compara também o PDF vetorial
+(VectorRenderContext) e mostra o tamanho médio de cada arquivo.
+
+Uso: python -m benchmarks.bench_render [--count N] [--font CAMINHO] [--pdf]
+"""
+import argparse
+import io
+import os
+import time
+from dataclasses import replace
+
+from PIL import Image, ImageDraw, ImageFont
+
+from autocert.layout import default_fields, pad_certificate_number, row_values
+from autocert.render import RenderContext
+from benchmarks.fonts import find_any_font
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Template.png")
+# Dentro do Template.png (2000x1414): o y dos padrões do CertificateJob fica fora desta imagem
+NAME_POSITION, NUMBER_POSITION = (200, 740), (570, 1010)
+
+
+def render_per_row(font_path, name, number):
+    # Caminho antigo: decodifica o modelo e cria as fontes a cada certificado
+    image = Image.open(TEMPLATE)
+    draw = ImageDraw.Draw(image)
+    draw.text(NAME_POSITION, name, font=ImageFont.truetype(font_path, 100), fill=(0, 0, 0))
+    draw.text(NUMBER_POSITION, pad_certificate_number(number), font=ImageFont.truetype(font_path, 60), fill=(0, 0, 0))
+    return image
+
+
+def encode_pdf(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PDF")
+    return buffer.getvalue()
+
+
+def timed(count, render_one):
+    # render_one devolve uma imagem (só o desenho) ou os bytes do PDF
+    size = 0
+    start = time.perf_counter()
+    for index in range(count):
+        result = render_one(f"Participante {index}", index)
+        if isinstance(result, bytes):
+            size += len(result)
+        else:
+            result.load()
+    return time.perf_counter() - start, size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--font", default=None)
+    parser.add_argument("--pdf", action="store_true", help="inclui a geração do PDF e o PDF vetorial na medição")
+    args = parser.parse_args()
+    font_path = args.font or find_any_font()
+
+    fields = tuple(replace(field, font_path=font_path) for field in default_fields(100, NAME_POSITION, 60, NUMBER_POSITION))
+    render_args = (TEMPLATE, fields)
+    context = RenderContext(*render_args)
+    if args.pdf:
+        from autocert.pdf import VectorRenderContext
+        vector = VectorRenderContext(*render_args)
+        cases = (
+            ("modelo por linha", lambda name, number: encode_pdf(render_per_row(font_path, name, number))),
+            ("RenderContext", lambda name, number: context.render_pdf(row_values(name, number))),
+            ("PDF vetorial", lambda name, number: vector.render_pdf(row_values(name, number))),
+        )
+    else:
+        cases = (
+            ("modelo por linha", lambda name, number: render_per_row(font_path, name, number)),
+            ("RenderContext", lambda name, number: context.render(row_values(name, number))),
+        )
+    for label, render_one in cases:
+        elapsed, size = timed(args.count, render_one)
+        line = f"{label:>18}: {args.count} certificados em {elapsed:.2f}s -> {args.count / elapsed:.1f} cert/s"
+        if args.pdf:
+            line += f", {size / 1024:.0f} KB por PDF"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
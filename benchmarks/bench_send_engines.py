@@ -0,0 +1,90 @@
+"""Compara os dois motores de envio (threads e async) como o usuário os roda: via send_certificates.
+
+Os dois usam o mesmo número de conexões SMTP (--threads, como no job); no motor
+async, até --max-in-flight mensagens ficam em andamento revezando-se nessas
+conexões. O modelo é pequeno, para o tempo de envio dominar, e o SMTP local
+responde com --latency segundos de atraso, como um provedor real. Além da taxa,
+mostra a CPU do processo principal (a renderização roda em outros processos).
+Uso:
+python -m benchmarks.bench_send_engines [--rows N] [--threads 5 10] [--max-in-flight N] [--latency S]
+"""
+import argparse
+import asyncio
+import csv
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from PIL import Image
+
+from autocert.fonts import FontIndex
+from autocert.job import CertificateJob
+from autocert.pipeline import send_certificates
+from benchmarks.bench_smtp_pool import PASSWORD, SENDER
+from benchmarks.fonts import find_any_font
+from benchmarks.smtp_sink import CountingHandler, SMTPSink
+
+
+class SlowHandler(CountingHandler):
+    """Simula a latência de um provedor real na resposta ao DATA."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        return await super().handle_DATA(server, session, envelope)
+
+
+def write_inputs(directory, rows):
+    template = os.path.join(directory, "modelo.png")
+    Image.new("RGB", (400, 200), "white").save(template)
+    data = os.path.join(directory, "destinatarios.csv")
+    with open(data, "w", newline="", encoding="utf-8") as data_file:
+        writer = csv.writer(data_file)
+        writer.writerow(["Nome", "Email", "Numero do Certificado"])
+        for index in range(rows):
+            writer.writerow([f"Participante {index}", f"p{index}@example.com", index + 1])
+    return template, data
+
+
+def run_engine(sink, directory, template, data, font_path, engine, threads, max_in_flight):
+    """``(enviados, segundos, segundos de CPU do processo principal)`` de um lote completo."""
+    job = CertificateJob(
+        template, data, font_name=os.path.splitext(os.path.basename(font_path))[0],
+        font_size=20, name_position=(10, 10), cert_font_size=12, cert_position=(10, 60),
+        sender_email=SENDER, sender_password=PASSWORD,
+        smtp_host="127.0.0.1", smtp_port=sink.port, smtp_ssl=False, smtp_starttls=False,
+        engine=engine, threads=threads, max_in_flight=max_in_flight, render_workers=1,
+        journal_path=os.path.join(directory, f"{engine}_{threads}.sqlite"),
+        send_log_path=os.path.join(directory, "envios.sqlite"),  # fora do registro real do usuário
+    )
+    cpu, start = time.process_time(), time.perf_counter()
+    with open(os.devnull, "w") as quiet, redirect_stdout(quiet):  # sem uma linha por email
+        result = send_certificates(job, FontIndex([os.path.dirname(font_path)]))
+    return result.sent, time.perf_counter() - start, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--threads", type=int, nargs="+", default=[5], help="conexões SMTP (as mesmas nos dois motores)")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="mensagens em andamento no motor async")
+    parser.add_argument("--latency", type=float, default=0.05, help="atraso do servidor por mensagem (s)")
+    args = parser.parse_args()
+    font_path = find_any_font()
+
+    with tempfile.TemporaryDirectory() as tmp, SMTPSink(SlowHandler(args.latency)) as sink:
+        template, data = write_inputs(tmp, args.rows)
+        for threads in args.threads:
+            for engine in ("threads", "async"):
+                sent, elapsed, cpu = run_engine(sink, tmp, template, data, font_path, engine, threads,
+                                                args.max_in_flight)
+                print(f"{engine:>8}, {threads} conexões: {sent} mensagens em {elapsed:.2f}s "
+                      f"-> {sent / elapsed:.1f} msg/s, CPU {cpu:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compara mensagens/s: um login por certificado (antigo) vs. SMTPConnectionPool.
+
+Uso: python -m benchmarks.bench_smtp_pool [--messages N] [--threads T]
+"""
+import argparse
+import time
+from queue import Queue, Empty
+from threading import Thread
+
+import yagmail
+
+from autocert.smtp import SMTPConnectionPool
+from benchmarks.smtp_sink import SMTPSink
+
+SENDER = 'bench@example.com'
+PASSWORD = 'senha'
+
+
+def run_threads(total, threads, send_one):
+    queue = Queue()
+    for index in range(total):
+        queue.put(index)
+
+    def worker():
+        while True:
+            try:
+                index = queue.get_nowait()
+            except Empty:
+                return
+            send_one(index)
+
+    workers = [Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_login_per_message(sink, total, threads):
+    def send_one(index):
+        usuario = yagmail.SMTP(user=SENDER, password=PASSWORD, **sink.smtp_kwargs)
+        usuario.send(to=f'dest{index}@example.com', subject='Certificado', contents='Olá')
+        usuario.close()
+    return run_threads(total, threads, send_one)
+
+
+def bench_pool(sink, total, threads):
+    with SMTPConnectionPool(SENDER, PASSWORD, size=threads, **sink.smtp_kwargs) as pool:
+        return run_threads(total, threads, lambda index: pool.send(
+            to=f'dest{index}@example.com', subject='Certificado', contents='Olá'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=5)
+    args = parser.parse_args()
+
+    with SMTPSink() as sink:
+        for label, bench in (('login por mensagem', bench_login_per_message), ('pool', bench_pool)):
+            before = sink.handler.received
+            elapsed = bench(sink, args.messages, args.threads)
+            delivered = sink.handler.received - before
+            print(f'{label:>20}: {delivered} mensagens em {elapsed:.2f}s -> {delivered / elapsed:.1f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
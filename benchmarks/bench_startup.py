@@ -0,0 +1,148 @@
+"""Tempo de abertura da interface: importação do AutoCert.py e, com tela, até a janela aparecer.
+
+Cada medição roda em um processo Python novo. Sai com código 1 se a mediana passar
+do orçamento ou se algum módulo pesado (envio, planilhas, PDF vetorial) voltar a
+ser importado na abertura: eles só devem ser carregados no primeiro uso.
+
+Uso: python -m benchmarks.bench_startup [--runs N] [--import-budget MS] [--window-budget MS]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carregados só quando usados: planilha, envio, exportação, pré-visualização, métricas via HTTP e fontes
+DEFERRED_MODULES = ('yagmail', 'aiosmtplib', 'reportlab', 'openpyxl', 'pandas', 'asyncio', 'http.server',
+                    'multiprocessing', 'concurrent.futures.process', 'autocert.pipeline', 'autocert.smtp',
+                    'autocert.preview', 'autocert.render', 'autocert.validation', 'PIL.ImageFont')
+IMPORT_BUDGET_MS = 300
+WINDOW_BUDGET_MS = 1500
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import AutoCert
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+# Só a biblioteca da interface: o que ela carrega por conta própria não depende do AutoCert
+TOOLKIT_PROBE = """
+import json, sys
+import ttkbootstrap
+print(json.dumps({'seconds': 0, 'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+# Os módulos do pacote que o AutoCert.py importa na abertura, sem a interface
+PACKAGE_PROBE = """
+import importlib, json, sys
+for module in %r:
+    importlib.import_module(module)
+print(json.dumps({'seconds': 0, 'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+# Até a janela ser desenhada pela primeira vez; a varredura das fontes continua em segundo plano
+WINDOW_PROBE = """
+import json, time
+start = time.perf_counter()
+import AutoCert
+app = AutoCert.EditCertificate()
+app.window.update()
+elapsed = time.perf_counter() - start
+app.window.destroy()
+print(json.dumps({'seconds': elapsed, 'loaded': []}))
+"""
+
+
+def run_probe(code, cwd):
+    # Processo novo a cada medição; o config.ini criado pela interface fica na pasta temporária
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (ROOT, os.environ.get('PYTHONPATH')))))
+    completed = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True,
+                               timeout=120)
+    if completed.returncode:
+        error = completed.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"código de saída {completed.returncode}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(code, runs):
+    """Mediana em segundos de ``runs`` processos (após um de aquecimento) e os módulos adiados carregados."""
+    with tempfile.TemporaryDirectory() as tmp:
+        run_probe(code, tmp)  # gera o bytecode e aquece o cache de disco
+        results = [run_probe(code, tmp) for _ in range(runs)]
+    seconds = sorted(result['seconds'] for result in results)
+    return seconds[len(seconds) // 2], sorted(set().union(*(result['loaded'] for result in results)))
+
+
+def startup_modules():
+    # Módulos do pacote importados no topo do AutoCert.py
+    with open(os.path.join(ROOT, 'AutoCert.py'), 'rb') as source:
+        tree = ast.parse(source.read())
+    return sorted({node.module for node in tree.body
+                   if isinstance(node, ast.ImportFrom) and (node.module or '').startswith('autocert')})
+
+
+def toolkit_modules():
+    """Módulos adiados que o ttkbootstrap já carrega sozinho (com o Pillow 11+, o ``PIL.ImageFont``)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        return set(run_probe(TOOLKIT_PROBE % (DEFERRED_MODULES,), tmp)['loaded'])
+
+
+def measure_package():
+    """Módulos adiados carregados pelos módulos do pacote que o AutoCert.py importa na abertura."""
+    with tempfile.TemporaryDirectory() as tmp:
+        return run_probe(PACKAGE_PROBE % (startup_modules(), DEFERRED_MODULES), tmp)['loaded']
+
+
+def measure_import(runs=5):
+    """Mediana da importação do AutoCert e os módulos adiados carregados, fora os da própria interface."""
+    seconds, loaded = measure(IMPORT_PROBE % (DEFERRED_MODULES,), runs)
+    return seconds, sorted(set(loaded) - toolkit_modules())
+
+
+def measure_window(runs=3):
+    return measure(WINDOW_PROBE, runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS,
+                        help="mediana máxima da importação, em ms")
+    parser.add_argument("--window-budget", type=float, default=WINDOW_BUDGET_MS,
+                        help="mediana máxima até a janela, em ms")
+    args = parser.parse_args()
+    failures = []
+
+    seconds, loaded = measure_import(args.runs)
+    loaded = sorted(set(loaded).union(measure_package()))
+    print(f"importação do AutoCert: {seconds * 1000:.0f} ms (orçamento {args.import_budget:.0f} ms)")
+    if seconds * 1000 > args.import_budget:
+        failures.append("importação acima do orçamento")
+    if loaded:
+        print(f"  importados na abertura, mas deveriam esperar o primeiro uso: {', '.join(loaded)}")
+        failures.append("módulos pesados na abertura")
+
+    try:
+        seconds, _ = measure_window(max(1, args.runs // 2))
+    except RuntimeError as e:
+        # Sem tela (servidor, CI) a janela não pode ser criada: só a importação é verificada
+        print(f"janela: não medida ({e})")
+    else:
+        print(f"até a janela aparecer: {seconds * 1000:.0f} ms (orçamento {args.window_budget:.0f} ms)")
+        if seconds * 1000 > args.window_budget:
+            failures.append("janela acima do orçamento")
+
+    if failures:
+        print(f"FALHOU: {'; '.join(failures)}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
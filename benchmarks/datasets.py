@@ -0,0 +1,80 @@
+"""Planilhas sintéticas para os benchmarks, com nomes acentuados, em outros alfabetos e muito longos.
+
+As colunas são copiadas de Nomes.xlsx, e a mesma semente gera sempre as mesmas linhas.
+Uso: python -m benchmarks.datasets --rows 10000 destino.csv
+"""
+import argparse
+import csv
+import os
+import random
+
+from openpyxl import Workbook, load_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE = os.path.join(ROOT, "Template.png")
+SAMPLE_SPREADSHEET = os.path.join(ROOT, "Nomes.xlsx")
+
+FIRST_NAMES = ("Ana", "João", "Maria", "José", "Francisca", "Antônio", "Conceição", "Luís", "Inês",
+               "Björn", "Zoë", "François", "Łukasz", "Søren", "Иван", "Ελένη", "山田", "محمد")
+LAST_NAMES = ("Silva", "Santos", "Oliveira", "Souza", "Conceição", "Gonçalves", "Araújo", "Müller",
+              "Núñez", "Ærøskøbing", "Петров", "Παπαδόπουλος", "太郎", "الحسيني")
+LONG_NAME_RATE = 0.05  # fração de nomes com ~120 caracteres
+
+
+def sample_header():
+    # O cabeçalho da planilha de exemplo, para os dados sintéticos seguirem o mesmo formato
+    workbook = load_workbook(SAMPLE_SPREADSHEET, read_only=True)
+    try:
+        return [cell for cell in next(workbook.active.iter_rows(values_only=True)) if cell is not None]
+    finally:
+        workbook.close()
+
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        parts = [rng.choice(FIRST_NAMES)] + [rng.choice(LAST_NAMES) for _ in range(rng.randint(1, 3))]
+        if rng.random() < LONG_NAME_RATE:
+            parts += [rng.choice(LAST_NAMES) for _ in range(20)]
+        name = " ".join(parts)[:120]
+        yield name, f"participante{index}@example.com", str(index + 1)
+
+
+def write_dataset(path, count, seed=0):
+    """Grava ``count`` linhas em ``path`` (.xlsx ou .csv, pela extensão)."""
+    header = sample_header()
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(header)
+            writer.writerows(synthetic_rows(count, seed))
+        return path
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in synthetic_rows(count, seed):
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def cached_dataset(data_dir, count, extension, seed=0):
+    # Planilhas grandes demoram para gerar: reaproveita as que já existem em data_dir
+    path = os.path.join(data_dir, f"sintetico_{count}_{seed}.{extension}")
+    if not os.path.exists(path):
+        write_dataset(path, count, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="arquivo de destino (.xlsx ou .csv)")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_dataset(args.path, args.rows, args.seed)
+    print(f"{args.rows} linhas gravadas em {args.path}")
+
+
+if __name__ == "__main__":
+    main()
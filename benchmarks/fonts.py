@@ -0,0 +1,13 @@
+import os
+
+# Diretórios onde os benchmarks procuram uma fonte TrueType qualquer
+FONT_DIRS = ("C:\\Windows\\Fonts", "/usr/share/fonts", "/Library/Fonts", os.path.expanduser("~/.fonts"))
+
+
+def find_any_font():
+    for fonts_dir in FONT_DIRS:
+        for root, dirs, files in os.walk(fonts_dir):
+            for file in sorted(files):
+                if file.lower().endswith(('.ttf', '.otf')):
+                    return os.path.join(root, file)
+    raise FileNotFoundError("Nenhuma fonte .ttf/.otf encontrada para o benchmark.")
@@ -0,0 +1,69 @@
+"""Servidor SMTP local (aiosmtpd) que aceita e descarta as mensagens, para benchmarks."""
+import logging
+import random
+import socket
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+# O aiosmtpd registra um aviso sobre login_data a cada AUTH; irrelevante para o benchmark
+logging.getLogger('mail.log').setLevel(logging.ERROR)
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 OK'
+
+
+class FlakyHandler(CountingHandler):
+    """Recusa uma fração das mensagens com um erro temporário (4xx), como um provedor limitando rajadas."""
+
+    def __init__(self, failure_rate=0.2, reply='451 4.7.1 Try again later', seed=None):
+        super().__init__()
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.rejected = 0
+        self._random = random.Random(seed)
+
+    async def handle_DATA(self, server, session, envelope):
+        if self._random.random() < self.failure_rate:
+            self.rejected += 1
+            return self.reply
+        return await super().handle_DATA(server, session, envelope)
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SMTPSink:
+    """Sobe o servidor em uma thread; use como context manager."""
+
+    def __init__(self, handler=None, port=None):
+        self.handler = handler or CountingHandler()
+        self.port = port or free_port()
+        self.controller = Controller(self.handler, hostname='127.0.0.1', port=self.port,
+                                     authenticator=accept_any_login, auth_require_tls=False)
+
+    @property
+    def smtp_kwargs(self):
+        # Argumentos para yagmail.SMTP / SMTPConnectionPool apontarem para o sink
+        return {'host': '127.0.0.1', 'port': self.port, 'smtp_ssl': False, 'smtp_starttls': False}
+
+    def __enter__(self):
+        self.controller.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.controller.stop()
+        return False
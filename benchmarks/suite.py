@@ -0,0 +1,318 @@
+"""Suíte de benchmarks do pipeline: cada etapa isolada e o lote completo, com resultados em JSON.
+
+Etapas medidas:
+- início: importação do AutoCert.py em um processo novo (ver bench_startup);
+- fontes: varredura do índice (sem e com cache em disco) e resolução de nomes;
+- leitura: RecipientReader em planilhas sintéticas .csv e .xlsx (1k/10k/100k linhas);
+- validação: validate_recipients nas planilhas .csv de leitura, com DNS simulado;
+- renderização: create_certificate no Template.png, com desenho e geração do PDF
+  separados, nos formatos vetorial e raster;
+- envio: SMTPConnectionPool contra um SMTP local, com um PDF real anexado;
+- exportação: export_certificates da mesma planilha para uma pasta e para um ZIP,
+  e de novo para o ZIP com o cache de renderização já preenchido;
+- lote completo: send_certificates de uma planilha sintética até o SMTP local.
+
+Compare com uma execução anterior para ver regressões (código de saída 1 se houver):
+python -m benchmarks.suite --save-baseline base.json
+python -m benchmarks.suite --baseline base.json [--tolerance 0.25]
+Use --quick para uma rodada curta e --only leitura render ... para escolher etapas.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from autocert.fonts import FontIndex, default_font_dirs
+from autocert.job import CertificateJob
+from autocert.layout import TextField, default_fields, resolve_fonts
+from autocert.metrics import BatchMetrics
+from autocert.pipeline import certificate_attachment, create_certificate, export_certificates, send_certificates
+from autocert.render import create_render_context
+from autocert.smtp import SMTPConnectionPool
+from autocert.spreadsheet import RecipientReader
+from autocert.validation import DomainChecker, validate_recipients
+from benchmarks.bench_smtp_pool import PASSWORD, SENDER, run_threads
+from benchmarks.bench_startup import measure_import
+from benchmarks.datasets import SAMPLE_SPREADSHEET, TEMPLATE, cached_dataset, synthetic_rows
+from benchmarks.fonts import find_any_font
+from benchmarks.smtp_sink import SMTPSink
+
+STAGES = ('inicio', 'fontes', 'leitura', 'validacao', 'render', 'envio', 'exportacao', 'lote')
+# Posições dentro do Template.png (2000x1414). O x vem dos padrões do CertificateJob; o y
+# dos padrões (1340 e 1930) fica na borda ou fora desta imagem, então o nome vai logo
+# abaixo de "Certificamos que" e o número na linha da carga horária
+LAYOUT = dict(font_size=100, name_position=(200, 740), cert_font_size=60, cert_position=(570, 1010))
+# Layout com vários campos: nome centralizado com ajuste de largura, texto fixo e QR code
+FIELDS = (
+    TextField('nome', '{Nome}', (1000, 740), 100, align='center', max_width=1400, color='#1a3c6e'),
+    TextField('curso', 'concluiu o curso Desempenho em Python em 18/10/2026', (1000, 1120), 40, align='center'),
+    TextField('numero', 'Certificado nº {Numero do Certificado}', (1900, 1330), 40, align='right'),
+    TextField('qr', 'https://exemplo.com/validar/{Numero do Certificado}', (100, 1150), 220, kind='qrcode'),
+)
+
+
+def render_args(font_path, fields=None):
+    fields = fields or default_fields(**LAYOUT)
+    font_name = os.path.splitext(os.path.basename(font_path))[0]
+    return TEMPLATE, resolve_fonts(fields, FontIndex([os.path.dirname(font_path)]), font_name)
+
+
+class Results:
+    """Resultados nomeados com unidade e direção ("higher" ou "lower" é melhor)."""
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, name, value, unit, better='higher'):
+        self.values[name] = {'value': round(value, 4), 'unit': unit, 'better': better}
+        print(f"  {name:<32} {value:>12.2f} {unit}")
+
+
+def best_of(repeat, run):
+    # Menor tempo entre as repetições: menos sensível a ruído da máquina do que a média
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_startup(results, args):
+    seconds, _ = measure_import(args.repeat + 2)
+    results.add("inicio.importacao", seconds * 1000, "ms", "lower")
+
+
+def bench_fonts(results, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "fonts_cache.json")
+
+        def scan_without_cache():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            FontIndex(default_font_dirs(), cache_path=cache_path).load()
+
+        cold = best_of(args.repeat, scan_without_cache)
+        results.add("fontes.varredura_sem_cache", cold * 1000, "ms", "lower")
+        warm = best_of(args.repeat, lambda: FontIndex(default_font_dirs(), cache_path=cache_path).load())
+        results.add("fontes.varredura_com_cache", warm * 1000, "ms", "lower")
+    index = FontIndex(default_font_dirs())
+    families = index.families()
+    # Nome exato, em outra caixa e parcial (o caminho mais lento do resolve)
+    names = [family for family in families[:50]] + [family.upper() for family in families[:50]]
+    names += [family[1:-1] for family in families[:50] if len(family) > 3]
+    count = 0
+    start = time.perf_counter()
+    for _ in range(20):
+        for name in names:
+            index.resolve(name)
+            count += 1
+    results.add("fontes.resolve", count / (time.perf_counter() - start), "nomes/s")
+
+
+def bench_ingest(results, args):
+    for rows in args.sizes:
+        for extension in ('csv', 'xlsx'):
+            path = cached_dataset(args.data_dir, rows, extension)
+
+            def read_all():
+                read = sum(1 for _ in RecipientReader(path))
+                assert read == rows, f"{path}: {read} linhas lidas, esperadas {rows}"
+
+            results.add(f"leitura.{extension}_{rows}", rows / best_of(args.repeat, read_all), "linhas/s")
+    elapsed = best_of(args.repeat, lambda: list(RecipientReader(SAMPLE_SPREADSHEET)))
+    results.add("leitura.nomes_xlsx", elapsed * 1000, "ms", "lower")
+
+
+def bench_validate(results, args):
+    # Resolvedor local: mede a passada e o cache por domínio, não a rede
+    checker = DomainChecker(lambda domain: True)
+    for rows in args.sizes:
+        job = CertificateJob(TEMPLATE, cached_dataset(args.data_dir, rows, 'csv'), check_domains=True)
+
+        def validate():
+            report = validate_recipients(job, checker)
+            assert report.valid == rows, f"validação: {report.valid} de {rows} linhas válidas"
+
+        results.add(f"validacao.csv_{rows}", rows / best_of(args.repeat, validate), "linhas/s")
+
+
+def bench_render(results, args):
+    font_path = find_any_font()
+    # O raster leva quase um segundo por PDF: poucas amostras bastam
+    cases = (('vector', None, args.render_count), ('raster', None, max(2, args.render_count // 50)),
+             ('vector_campos', FIELDS, args.render_count))
+    for label, fields, count in cases:
+        backend = label.split('_')[0]
+        context = create_render_context(backend, render_args(font_path, fields))
+        names = [row[0] for row in synthetic_rows(count, seed=1)]
+        render_time = encode_time = size = 0
+        start = time.perf_counter()
+        for number, name in enumerate(names):
+            timings = {}
+            size += len(create_certificate(context, name, number, "certificado", timings)[1])
+            render_time += timings['render']
+            encode_time += timings['encode']
+        elapsed = time.perf_counter() - start
+        results.add(f"render.{label}.certificados", count / elapsed, "cert/s")
+        results.add(f"render.{label}.desenho", render_time / count * 1000, "ms", "lower")
+        results.add(f"render.{label}.pdf", encode_time / count * 1000, "ms", "lower")
+        results.add(f"render.{label}.tamanho", size / count / 1024, "KB", "lower")
+
+
+def bench_send(results, args):
+    font_path = find_any_font()
+    context = create_render_context('vector', render_args(font_path))
+    certificate = create_certificate(context, "Participante", 1, "certificado")
+    with SMTPSink() as sink:
+        for threads in (1, 5):
+            with SMTPConnectionPool(SENDER, PASSWORD, size=threads, **sink.smtp_kwargs) as pool:
+                def send_one(index):
+                    pool.send(to=f"dest{index}@example.com", subject="Certificado", contents="Olá",
+                              attachments=certificate_attachment(certificate))
+                elapsed = run_threads(args.messages, threads, send_one)
+            results.add(f"envio.smtp_x{threads}", args.messages / elapsed, "msg/s")
+
+
+def bench_export(results, args):
+    font_path = find_any_font()
+    font_index = FontIndex([os.path.dirname(font_path)])
+    font_name = os.path.splitext(os.path.basename(font_path))[0]
+    rows = args.batch_rows
+    job = CertificateJob(TEMPLATE, cached_dataset(args.data_dir, rows, 'csv'), font_name=font_name, **LAYOUT)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, destination in (('pasta', os.path.join(tmp, 'pdfs')), ('zip', os.path.join(tmp, 'pdfs.zip'))):
+            start = time.perf_counter()
+            result = export_certificates(job, font_index, destination)
+            elapsed = time.perf_counter() - start
+            assert result.written == rows, f"exportação {label}: {result.written} de {rows} gravados"
+            results.add(f"exportacao.{label}_{rows}", rows / elapsed, "cert/s")
+        # Segunda rodada com o mesmo cache: todas as linhas devem vir do disco
+        cached_job = replace(job, cache_dir=os.path.join(tmp, 'cache'))
+        export_certificates(cached_job, font_index, os.path.join(tmp, 'frio.zip'))
+        metrics = BatchMetrics()
+        start = time.perf_counter()
+        export_certificates(cached_job, font_index, os.path.join(tmp, 'quente.zip'), metrics=metrics)
+        elapsed = time.perf_counter() - start
+        assert metrics.counters['cache_hits'] == rows, f"cache: {metrics.counters['cache_hits']} de {rows} acertos"
+        results.add(f"exportacao.zip_cache_{rows}", rows / elapsed, "cert/s")
+
+
+def bench_batch(results, args):
+    font_path = find_any_font()
+    font_index = FontIndex([os.path.dirname(font_path)])
+    font_name = os.path.splitext(os.path.basename(font_path))[0]
+    rows = args.batch_rows
+    data = cached_dataset(args.data_dir, rows, 'csv')
+    with SMTPSink() as sink, tempfile.TemporaryDirectory() as tmp:
+        for engine in ('threads', 'async'):
+            job = CertificateJob(
+                TEMPLATE, data, font_name=font_name, **LAYOUT,
+                sender_email=SENDER, sender_password=PASSWORD,
+                smtp_host="127.0.0.1", smtp_port=sink.port, smtp_ssl=False, smtp_starttls=False,
+                engine=engine, max_in_flight=20, journal_path=os.path.join(tmp, f"{engine}.sqlite"),
+                send_log_path=os.path.join(tmp, "envios.sqlite"),  # fora do registro real do usuário
+            )
+            metrics = BatchMetrics()
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as quiet, redirect_stdout(quiet):  # sem uma linha por email
+                result = send_certificates(job, font_index, metrics=metrics)
+            elapsed = time.perf_counter() - start
+            assert result.sent == rows, f"lote {engine}: {result.sent} de {rows} enviados"
+            results.add(f"lote.{engine}_{rows}", rows / elapsed, "cert/s")
+            for stage, summary in metrics.snapshot()['stages'].items():
+                if summary['count']:
+                    results.add(f"lote.{engine}.{stage}_p50", summary['p50'] * 1000, "ms", "lower")
+
+
+BENCHES = {'inicio': bench_startup, 'fontes': bench_fonts, 'leitura': bench_ingest, 'validacao': bench_validate,
+           'render': bench_render, 'envio': bench_send, 'exportacao': bench_export, 'lote': bench_batch}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(TEMPLATE), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Imprime a variação de cada resultado; retorna os nomes que pioraram além da tolerância."""
+    regressions = []
+    print(f"\nComparação com a linha de base ({baseline['meta'].get('revision')}, {baseline['meta']['date']}):")
+    for name, result in current.items():
+        before = baseline['results'].get(name)
+        if not before or not before['value']:
+            continue
+        change = result['value'] / before['value'] - 1
+        worse = change < -tolerance if result['better'] == 'higher' else change > tolerance
+        if worse:
+            regressions.append(name)
+        print(f"  {name:<32} {before['value']:>12.2f} -> {result['value']:>12.2f} {result['unit']:<8} "
+              f"{change:+.0%}{'  << REGRESSÃO' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="linhas das planilhas sintéticas de leitura")
+    parser.add_argument("--render-count", type=int, default=200, help="certificados vetoriais renderizados")
+    parser.add_argument("--messages", type=int, default=300, help="mensagens no benchmark de envio")
+    parser.add_argument("--batch-rows", type=int, default=1000, help="linhas do lote completo")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições das etapas isoladas (vale a melhor)")
+    parser.add_argument("--quick", action="store_true", help="rodada curta (1k linhas, menos amostras)")
+    parser.add_argument("--data-dir", help="onde guardar as planilhas sintéticas (reaproveitadas entre execuções)")
+    parser.add_argument("--output", default="benchmark-results.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--save-baseline", metavar="ARQUIVO", help="também grava os resultados como linha de base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="piora tolerada antes de apontar regressão")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.render_count, args.messages, args.batch_rows, args.repeat = [1000], 50, 100, 200, 1
+
+    results = Results()
+    with tempfile.TemporaryDirectory() as tmp:
+        args.data_dir = args.data_dir or tmp
+        os.makedirs(args.data_dir, exist_ok=True)
+        for stage in STAGES:
+            if stage in args.only:
+                print(f"[{stage}]")
+                BENCHES[stage](results, args)
+
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('data_dir',)},
+        },
+        'results': results.values,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(results.values, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressões acima de {args.tolerance:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
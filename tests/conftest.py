@@ -0,0 +1,61 @@
+import csv
+import os
+
+import pytest
+from PIL import Image
+
+from autocert.fonts import FontIndex
+from autocert.job import CertificateJob
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'timing: mede tempo de relógio; só roda com AUTOCERT_TIMING_TESTS=1')
+
+
+def pytest_collection_modifyitems(config, items):
+    # Tempos absolutos variam com a máquina e a carga do CI: ficam fora da execução padrão
+    if os.environ.get('AUTOCERT_TIMING_TESTS') == '1':
+        return
+    skip = pytest.mark.skip(reason='teste de tempo: defina AUTOCERT_TIMING_TESTS=1 para rodar')
+    for item in items:
+        if 'timing' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def font_path():
+    from benchmarks.fonts import find_any_font
+    try:
+        return find_any_font()
+    except FileNotFoundError as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def font_index(font_path):
+    return FontIndex([os.path.dirname(font_path)])
+
+
+@pytest.fixture
+def make_job(tmp_path, font_path):
+    """Lote pequeno (modelo 400x200, ``rows`` linhas em CSV) apontando para um SMTP local."""
+    def make(rows=12, sink=None, **options):
+        template = tmp_path / 'modelo.png'
+        Image.new('RGB', (400, 200), 'white').save(template)
+        data = tmp_path / 'destinatarios.csv'
+        with open(data, 'w', newline='', encoding='utf-8') as data_file:
+            writer = csv.writer(data_file)
+            writer.writerow(['Nome', 'Email', 'Numero do Certificado'])
+            for index in range(rows):
+                writer.writerow([f'Participante {index}', f'p{index}@example.com', index + 1])
+        values = dict(
+            font_name=os.path.splitext(os.path.basename(font_path))[0], font_size=20, name_position=(10, 10),
+            cert_font_size=12, cert_position=(10, 60), sender_email='teste@example.com', sender_password='senha',
+            threads=2, max_in_flight=4, render_workers=1,
+            send_log_path=str(tmp_path / 'envios.sqlite'),  # nunca o registro de envios do usuário
+        )
+        if sink:
+            values.update(smtp_host='127.0.0.1', smtp_port=sink.port, smtp_ssl=False, smtp_starttls=False)
+        values.update(options)
+        return CertificateJob(str(template), str(data), **values)
+    return make
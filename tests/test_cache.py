@@ -0,0 +1,95 @@
+"""Cache de renderização: acertos, o que invalida a chave e a remoção por LRU."""
+import os
+import shutil
+from dataclasses import replace
+
+import pytest
+from PIL import Image
+
+from autocert.cache import RenderCache, store
+from autocert.layout import default_fields, row_values
+from autocert.metrics import BatchMetrics
+from autocert.pipeline import export_certificates
+
+ROW = row_values('Maria Souza', 7, {'Email': 'maria@example.com'})
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / 'modelo.png'
+    Image.new('RGB', (400, 200), 'white').save(path)
+    return path
+
+
+@pytest.fixture
+def fields(tmp_path, font_path):
+    # Uma cópia da fonte, para os testes poderem alterar os bytes dela
+    copy = tmp_path / os.path.basename(font_path)
+    shutil.copyfile(font_path, copy)
+    return tuple(replace(field, font_path=str(copy)) for field in default_fields(20, (10, 10), 12, (10, 60)))
+
+
+def cache_path(tmp_path, template, fields, values=ROW, backend='raster'):
+    return RenderCache(str(tmp_path / 'cache'), 1024 * 1024, backend, (str(template), fields)).path(values)
+
+
+def test_identical_job_hits_the_cache(make_job, font_index, tmp_path):
+    job = make_job(3, cache_dir=str(tmp_path / 'cache'))
+    first, second = BatchMetrics(), BatchMetrics()
+    export_certificates(job, font_index, str(tmp_path / 'primeiro.zip'), metrics=first)
+    export_certificates(job, font_index, str(tmp_path / 'segundo.zip'), metrics=second)
+    assert (first.counters['cache_hits'], first.counters['cache_misses']) == (0, 3)
+    assert (second.counters['cache_hits'], second.counters['cache_misses']) == (3, 0)
+    assert (tmp_path / 'primeiro.zip').read_bytes() == (tmp_path / 'segundo.zip').read_bytes()
+
+
+def test_same_inputs_give_the_same_key(tmp_path, template, fields):
+    assert cache_path(tmp_path, template, fields) == cache_path(tmp_path, template, fields)
+    # Colunas que nenhum campo usa não entram na chave
+    other_email = row_values('Maria Souza', 7, {'Email': 'outra@example.com'})
+    assert cache_path(tmp_path, template, fields, other_email) == cache_path(tmp_path, template, fields)
+
+
+def test_template_bytes_change_the_key(tmp_path, template, fields):
+    before = cache_path(tmp_path, template, fields)
+    Image.new('RGB', (400, 200), 'black').save(template)  # mesmo caminho, outro conteúdo
+    assert cache_path(tmp_path, template, fields) != before
+
+
+def test_font_bytes_change_the_key(tmp_path, template, fields):
+    before = cache_path(tmp_path, template, fields)
+    with open(fields[0].font_path, 'ab') as font_file:
+        font_file.write(b'\0')
+    assert cache_path(tmp_path, template, fields) != before
+
+
+@pytest.mark.parametrize('change', [
+    {'position': (11, 10)},
+    {'size': 21},
+    {'color': '#ff0000'},
+    {'align': 'center'},
+    {'max_width': 300},
+])
+def test_layout_changes_change_the_key(tmp_path, template, fields, change):
+    moved = (replace(fields[0], **change),) + fields[1:]
+    assert cache_path(tmp_path, template, moved) != cache_path(tmp_path, template, fields)
+
+
+def test_backend_and_row_values_change_the_key(tmp_path, template, fields):
+    key = cache_path(tmp_path, template, fields)
+    assert cache_path(tmp_path, template, fields, backend='vector') != key
+    assert cache_path(tmp_path, template, fields, row_values('Maria Sousa', 7)) != key
+    assert cache_path(tmp_path, template, fields, row_values('Maria Souza', 8)) != key
+
+
+def test_prune_removes_the_least_recently_used(tmp_path, template, fields):
+    cache = RenderCache(str(tmp_path / 'cache'), 2500, 'raster', (str(template), fields))
+    rows = [row_values(f'Participante {index}', index) for index in range(4)]
+    paths = [cache.path(values) for values in rows]
+    for age, path in enumerate(paths):
+        assert store(path, b'x' * 1000)
+        os.utime(path, (1000 + age, 1000 + age))  # o primeiro é o mais antigo
+    cache.lookup(rows[0])  # ler marca como usado agora
+    assert cache.prune() == 2
+    assert [os.path.exists(path) for path in paths] == [True, False, False, True]
+    assert cache.prune() == 0  # já cabe
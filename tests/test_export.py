@@ -0,0 +1,55 @@
+"""Exportação sem envio: para uma pasta e para um ZIP."""
+import csv
+import zipfile
+
+import pytest
+
+from autocert.layout import TextField
+from autocert.pipeline import export_certificates
+
+EXPECTED = ['certificado_0001.pdf', 'certificado_0002.pdf', 'certificado_0003.pdf']
+
+
+def test_export_to_zip(make_job, font_index, tmp_path):
+    destination = tmp_path / 'certificados.zip'
+    result = export_certificates(make_job(3), font_index, str(destination))
+    assert (result.written, result.failed, result.stopped) == (3, 0, False)
+    with zipfile.ZipFile(destination) as archive:
+        assert archive.namelist() == EXPECTED  # na ordem da planilha
+        assert all(archive.read(name).startswith(b'%PDF') for name in EXPECTED)
+
+
+def test_export_to_directory(make_job, font_index, tmp_path):
+    destination = tmp_path / 'certificados'
+    result = export_certificates(make_job(3), font_index, str(destination))
+    assert (result.written, result.failed) == (3, 0)
+    assert sorted(path.name for path in destination.iterdir()) == EXPECTED
+    assert all((destination / name).read_bytes().startswith(b'%PDF') for name in EXPECTED)
+
+
+@pytest.fixture
+def job_with_bad_row(make_job):
+    # A segunda linha tem um código grande demais para o QR code: só ela falha ao renderizar
+    job = make_job(fields=(TextField('nome', '{Nome}', (10, 10), 20),
+                           TextField('codigo', '{Codigo}', (300, 10), 80, kind='qrcode')))
+    with open(job.data_path, 'w', newline='', encoding='utf-8') as data_file:
+        writer = csv.writer(data_file)
+        writer.writerow(['Nome', 'Email', 'Numero do Certificado', 'Codigo'])
+        for index in range(3):
+            writer.writerow([f'Participante {index}', f'p{index}@example.com', index + 1,
+                             'x' * 5000 if index == 1 else f'C{index}'])
+    return job
+
+
+def test_failed_row_removes_the_partial_zip(job_with_bad_row, font_index, tmp_path):
+    destination = tmp_path / 'certificados.zip'
+    with pytest.raises(RuntimeError, match='Participante 1'):
+        export_certificates(job_with_bad_row, font_index, str(destination))
+    assert not destination.exists()
+
+
+def test_failed_row_keeps_the_other_files_in_a_directory(job_with_bad_row, font_index, tmp_path):
+    destination = tmp_path / 'certificados'
+    result = export_certificates(job_with_bad_row, font_index, str(destination))
+    assert (result.written, result.failed) == (2, 1)
+    assert sorted(path.name for path in destination.iterdir()) == [EXPECTED[0], EXPECTED[2]]
@@ -0,0 +1,43 @@
+"""Índice de fontes: cache em disco e invalidação quando os diretórios mudam."""
+import os
+
+from autocert.fonts import FontIndex
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb'):
+        pass
+
+
+def index(tmp_path, *dirs):
+    return FontIndex([str(directory) for directory in dirs], cache_path=str(tmp_path / 'fontes.json'))
+
+
+def test_cache_is_reused_while_directories_are_unchanged(tmp_path):
+    touch(str(tmp_path / 'sistema' / 'One.ttf'))
+    assert index(tmp_path, tmp_path / 'sistema').families() == ['One']
+    assert os.path.exists(tmp_path / 'fontes.json')
+    assert index(tmp_path, tmp_path / 'sistema').resolve('one') == str(tmp_path / 'sistema' / 'One.ttf')
+
+
+def test_font_added_to_a_scanned_directory_invalidates_the_cache(tmp_path):
+    touch(str(tmp_path / 'sistema' / 'One.ttf'))
+    index(tmp_path, tmp_path / 'sistema').families()
+    touch(str(tmp_path / 'sistema' / 'sub' / 'Two.otf'))
+    assert index(tmp_path, tmp_path / 'sistema').families() == ['One', 'Two']
+
+
+def test_directory_created_after_the_cache_invalidates_it(tmp_path):
+    # Como ~/.local/share/fonts, que só passa a existir quando o usuário instala a primeira fonte
+    touch(str(tmp_path / 'sistema' / 'One.ttf'))
+    assert index(tmp_path, tmp_path / 'sistema', tmp_path / 'usuario').families() == ['One']
+    touch(str(tmp_path / 'usuario' / 'Two.ttf'))
+    assert index(tmp_path, tmp_path / 'sistema', tmp_path / 'usuario').families() == ['One', 'Two']
+
+
+def test_other_directories_do_not_reuse_the_cache(tmp_path):
+    touch(str(tmp_path / 'a' / 'One.ttf'))
+    touch(str(tmp_path / 'b' / 'Two.ttf'))
+    index(tmp_path, tmp_path / 'a').families()
+    assert index(tmp_path, tmp_path / 'b').families() == ['Two']
@@ -0,0 +1,28 @@
+"""Arquivo de layout: o que o save_config grava o from_config lê de volta, igual."""
+import pytest
+
+from autocert.job import CertificateJob
+
+CONTENTS = (
+    'Prezado {name},\n\nSegue seu certificado em anexo.\n\nAtenciosamente,\n\n  Equipe 100%\n',
+    '\tRecuo com tab e ; # = [colchetes]\n',
+    '',
+)
+
+
+@pytest.mark.parametrize('content', CONTENTS)
+def test_content_round_trips_through_the_layout_file(tmp_path, content):
+    job = CertificateJob(str(tmp_path / 'modelo.png'), str(tmp_path / 'dados.csv'), subject='Certificado',
+                         content=content, rate_limit=2.5, daily_limit=400, check_domains=True)
+    path = tmp_path / 'layout.ini'
+    job.save_config(str(path))
+    loaded = CertificateJob.from_config(str(path))
+    assert loaded.content == content
+    assert (loaded.subject, loaded.rate_limit, loaded.daily_limit, loaded.check_domains) == \
+        ('Certificado', 2.5, 400, True)
+
+
+def test_hand_written_content_is_still_read(tmp_path):
+    path = tmp_path / 'layout.ini'
+    path.write_text('[job]\ntemplate = modelo.png\ndata = dados.csv\ncontent = Olá {name}\n', encoding='utf-8')
+    assert CertificateJob.from_config(str(path)).content == 'Olá {name}'
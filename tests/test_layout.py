@@ -0,0 +1,37 @@
+"""Ajuste automático do tamanho da fonte à largura máxima do campo."""
+from dataclasses import replace
+
+import pytest
+
+from autocert.layout import TextField, fit_size, measure, placement
+
+LONG_NAME = 'Maria Aparecida de Albuquerque Cavalcanti Wanderley dos Santos Figueiredo'
+SHORT_NAME = 'Ana Lima'
+
+
+def test_long_name_shrinks_to_the_largest_size_that_fits(font_path):
+    max_width = measure(font_path, 48, LONG_NAME) // 2
+    size = fit_size(font_path, 48, 8, max_width, LONG_NAME)
+    assert 8 < size < 48
+    assert measure(font_path, size, LONG_NAME) <= max_width
+    assert measure(font_path, size + 1, LONG_NAME) > max_width  # o maior que cabe, não só um que cabe
+
+
+def test_short_name_keeps_the_base_size(font_path):
+    max_width = measure(font_path, 48, SHORT_NAME) + 1
+    assert fit_size(font_path, 48, 8, max_width, SHORT_NAME) == 48
+    assert fit_size(font_path, 48, 8, None, LONG_NAME) == 48  # sem largura máxima não há ajuste
+
+
+def test_size_never_goes_below_the_minimum(font_path):
+    assert fit_size(font_path, 48, 20, 10, LONG_NAME) == 20
+
+
+@pytest.mark.parametrize('align, anchor', [('left', 0), ('center', 0.5), ('right', 1)])
+def test_fitted_field_is_anchored_by_its_alignment(font_path, align, anchor):
+    field = replace(TextField('nome', '{Nome}', (800, 40), 48, align=align, max_width=700, min_size=8),
+                    font_path=font_path)
+    size, x = placement(field, LONG_NAME)
+    width = measure(font_path, size, LONG_NAME)
+    assert size < 48 and width <= 700
+    assert x == pytest.approx(800 - width * anchor)
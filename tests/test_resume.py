@@ -0,0 +1,43 @@
+"""Parar no meio do lote e retomar: cada pessoa recebe o certificado uma única vez."""
+import asyncio
+from collections import Counter
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+
+from autocert.pipeline import send_certificates  # noqa: E402
+from benchmarks.smtp_sink import CountingHandler, SMTPSink  # noqa: E402
+
+ROWS = 20
+
+
+class RecordingHandler(CountingHandler):
+    """Guarda os destinatários de cada mensagem e demora a confirmar, deixando envios em andamento ao parar.
+
+    A mensagem conta como entregue assim que os dados chegam, como em um servidor
+    real: cancelar a conversa antes da confirmação não a desfaz.
+    """
+
+    def __init__(self, delay=0.1):
+        super().__init__()
+        self.delay = delay
+        self.recipients = Counter()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.update(envelope.rcpt_tos)
+        self.received += 1
+        await asyncio.sleep(self.delay)
+        return '250 OK'
+
+
+@pytest.mark.parametrize('engine', ('threads', 'async'))
+def test_resume_after_stop_sends_each_row_once(make_job, font_index, engine):
+    with SMTPSink(RecordingHandler()) as sink:
+        job = make_job(ROWS, sink, engine=engine)
+        first = send_certificates(job, font_index, should_stop=lambda: sink.handler.received >= 5)
+        assert 0 < first.sent < ROWS
+        second = send_certificates(job, font_index, resume=True)
+    assert second.skipped == first.sent
+    assert first.sent + second.sent == ROWS
+    assert sink.handler.recipients == Counter(f'p{index}@example.com' for index in range(ROWS))
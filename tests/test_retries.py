@@ -0,0 +1,72 @@
+"""Novas tentativas, erros permanentes e limite diário, contra um SMTP local (aiosmtpd)."""
+import pytest
+
+pytest.importorskip('aiosmtpd')
+
+from autocert import async_send, pipeline  # noqa: E402
+from benchmarks.smtp_sink import FlakyHandler, SMTPSink  # noqa: E402
+
+ROWS = 12
+ENGINES = ('threads', 'async')
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # A espera exponencial real (2 s, 4 s...) só deixaria o teste lento
+    monkeypatch.setattr(pipeline, 'retry_delay', lambda attempt: 0)
+    monkeypatch.setattr(async_send, 'retry_delay', lambda attempt: 0)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_temporary_failures_are_retried_and_sent(make_job, font_index, engine):
+    with SMTPSink(FlakyHandler(0.3, seed=3)) as sink:
+        result = pipeline.send_certificates(make_job(ROWS, sink, engine=engine, max_retries=20), font_index)
+    assert sink.handler.rejected > 0
+    assert result.sent == ROWS
+    assert result.failed == 0
+    assert result.retries == sink.handler.rejected
+    assert sink.handler.received == ROWS
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_permanent_failures_are_not_retried(make_job, font_index, engine):
+    progress, errors = [], []
+    with SMTPSink(FlakyHandler(1.0, reply='550 5.1.1 Mailbox unavailable')) as sink:
+        result = pipeline.send_certificates(make_job(ROWS, sink, engine=engine, max_retries=5), font_index,
+                                            on_progress=lambda done, total: progress.append(done),
+                                            on_error=lambda email, error: errors.append(email))
+    assert result.sent == 0
+    assert result.failed == ROWS
+    assert result.retries == 0
+    assert sink.handler.rejected == ROWS  # uma única tentativa por linha
+    # As falhas também avançam o progresso, até fechar o lote
+    assert sorted(progress) == list(range(1, ROWS + 1))
+    assert sorted(errors) == sorted(f'p{i}@example.com' for i in range(ROWS))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_daily_limit_stops_the_run(make_job, font_index, engine):
+    with SMTPSink(FlakyHandler(0.0)) as sink:
+        result = pipeline.send_certificates(make_job(ROWS, sink, engine=engine, daily_limit=5), font_index)
+    assert result.quota_exceeded
+    assert result.sent == 5
+    assert sink.handler.received == 5
+
+
+def test_daily_limit_holds_across_fresh_runs_and_spreadsheets(make_job, font_index, tmp_path):
+    # O limite é da conta no provedor: lotes novos (sem --resume) e outras planilhas não o zeram
+    with SMTPSink(FlakyHandler(0.0)) as sink:
+        job = make_job(4, sink, daily_limit=5)
+        first = pipeline.send_certificates(job, font_index)
+        second = pipeline.send_certificates(job, font_index)
+        third = pipeline.send_certificates(job, font_index)
+        other_sheet = pipeline.send_certificates(
+            make_job(4, sink, daily_limit=5, journal_path=str(tmp_path / 'outra.sqlite')), font_index)
+        other_sender = pipeline.send_certificates(
+            make_job(4, sink, daily_limit=5, sender_email='outra@example.com'), font_index)
+    assert (first.sent, first.quota_exceeded) == (4, False)
+    assert (second.sent, second.quota_exceeded) == (1, True)
+    assert (third.sent, third.quota_exceeded) == (0, True)
+    assert (other_sheet.sent, other_sheet.quota_exceeded) == (0, True)
+    assert (other_sender.sent, other_sender.quota_exceeded) == (4, False)
+    assert sink.handler.received == 9
@@ -0,0 +1,67 @@
+"""Leitura da planilha: xlsx, CSV do Excel em português (';' e cp1252) e linhas em branco."""
+import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from autocert.spreadsheet import RecipientReader
+
+HEADER = ['Nome', 'Email', 'Numero do Certificado', 'Curso']
+ROWS = [
+    ['João da Silva', 'joao@exemplo.com', 1, 'Introdução'],
+    ['Maria Conceição', ' maria@exemplo.com ', 2, 'Avançado'],
+]
+
+
+def read(path):
+    with RecipientReader(str(path)) as reader:
+        return list(reader), reader
+
+
+def write_csv(path, text, encoding):
+    path.write_bytes(text.encode(encoding))
+    return path
+
+
+def test_xlsx(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER + ['Data'])
+    sheet.append(ROWS[0] + [datetime.datetime(2026, 10, 18)])
+    sheet.append([None, None, None, None])  # linha em branco no meio: pulada
+    sheet.append([ROWS[1][0], ROWS[1][1], 2.0, ROWS[1][3], None])
+    path = tmp_path / 'dados.xlsx'
+    workbook.save(path)
+    recipients, reader = read(path)
+    assert [(r.name, r.email, r.certificate_number, r.line) for r in recipients] == [
+        ('João da Silva', 'joao@exemplo.com', 1, 2),
+        ('Maria Conceição', 'maria@exemplo.com', 2, 4),
+    ]
+    assert recipients[0].columns['Data'] == '18/10/2026'
+    assert reader.total == 2
+
+
+@pytest.mark.parametrize('encoding', ('utf-8', 'utf-8-sig', 'cp1252'))
+def test_semicolon_csv_in_each_excel_encoding(tmp_path, encoding):
+    text = '\r\n'.join(';'.join(str(cell) for cell in row) for row in [HEADER] + ROWS) + '\r\n'
+    recipients, _ = read(write_csv(tmp_path / 'dados.csv', text, encoding))
+    assert [(r.name, r.email, r.certificate_number) for r in recipients] == [
+        ('João da Silva', 'joao@exemplo.com', '1'),
+        ('Maria Conceição', 'maria@exemplo.com', '2'),
+    ]
+    assert recipients[1].columns['Curso'] == 'Avançado'
+
+
+def test_cp1252_accent_far_from_the_start(tmp_path):
+    # O primeiro acento só aparece depois de muitas linhas ASCII: não pode falhar no meio do lote
+    lines = ['Nome,Email,Numero do Certificado']
+    lines += [f'Participante {index},p{index}@exemplo.com,{index}' for index in range(20000)]
+    lines.append('Sebastião,sebastiao@exemplo.com,20000')
+    recipients, _ = read(write_csv(tmp_path / 'dados.csv', '\n'.join(lines), 'cp1252'))
+    assert len(recipients) == 20001
+    assert recipients[-1].name == 'Sebastião'
+
+
+def test_missing_columns_are_reported(tmp_path):
+    with pytest.raises(ValueError, match='Numero do Certificado'):
+        RecipientReader(str(write_csv(tmp_path / 'dados.csv', 'Nome,Email\nAna,ana@exemplo.com\n', 'utf-8')))
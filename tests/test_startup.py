@@ -0,0 +1,30 @@
+"""A abertura da interface não pode voltar a carregar o envio, as planilhas, o PDF vetorial ou as fontes."""
+import pytest
+
+pytest.importorskip('ttkbootstrap')
+
+from benchmarks.bench_startup import IMPORT_BUDGET_MS, measure_import, measure_package  # noqa: E402
+
+HEAVY_MODULES = ('pandas', 'openpyxl', 'reportlab', 'aiosmtplib', 'yagmail', 'PIL.ImageFont')
+
+
+@pytest.fixture(scope='module')
+def loaded_modules():
+    # Um processo Python novo: o que o pytest já importou não conta
+    return measure_import(runs=1)[1]
+
+
+@pytest.mark.timing
+def test_import_time_within_budget():
+    # Depende da máquina: só roda com AUTOCERT_TIMING_TESTS=1 (ver conftest.py)
+    seconds, _ = measure_import(runs=3)  # a mediana de três descarta um processo lento
+    assert seconds * 1000 <= IMPORT_BUDGET_MS
+
+
+def test_heavy_modules_not_imported_by_autocert(loaded_modules):
+    assert not set(HEAVY_MODULES) & set(loaded_modules)
+
+
+def test_heavy_modules_not_imported_by_the_package():
+    # Sem a interface: o que o ttkbootstrap carrega sozinho não mascara uma regressão do pacote
+    assert not set(HEAVY_MODULES) & set(measure_package())
@@ -0,0 +1,110 @@
+"""Validação prévia da planilha: normalização dos emails, repetidos, motivos de rejeição e domínios."""
+import csv
+import socket
+import sys
+
+import pytest
+
+from autocert.validation import (DUPLICATE_EMAIL, DUPLICATE_NUMBER, EMPTY_EMAIL, EMPTY_NAME, EMPTY_NUMBER,
+                                 INVALID_EMAIL, NO_MAIL_DOMAIN, DomainChecker, normalize_email, number_key,
+                                 resolve_mail_domain, validate_recipients)
+
+
+def test_fallback_without_address_is_unknown(monkeypatch):
+    # Um domínio só com MX não tem endereço, mas recebe email: a resposta é "desconhecido"
+    monkeypatch.setitem(sys.modules, 'dns', None)
+
+    def no_address(host, port):
+        raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+
+    monkeypatch.setattr(socket, 'getaddrinfo', no_address)
+    assert resolve_mail_domain('alunos.exemplo.edu.br') is None
+
+
+def test_fallback_with_address_accepts(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'dns', None)
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda host, port: [])
+    assert resolve_mail_domain('exemplo.com.br') is True
+
+
+@pytest.mark.parametrize('email, expected', [
+    ('maria@exemplo.com', 'maria@exemplo.com'),
+    # Só o domínio vai para minúsculas: a parte local pode diferenciar caixa
+    ('Maria.Souza@Exemplo.COM.br', 'Maria.Souza@exemplo.com.br'),
+    ('ana+eventos@Gmail.com', 'ana+eventos@gmail.com'),
+    # Domínios acentuados viram IDNA (xn--), como o SMTP exige
+    ('maria@café.com.br', 'maria@xn--caf-dma.com.br'),
+    ('maria@CAFÉ.com.br', 'maria@xn--caf-dma.com.br'),
+    ('maria@xn--caf-dma.com.br', 'maria@xn--caf-dma.com.br'),
+    # Espaços nas pontas, comuns em emails colados, saem; no meio, o email é inválido
+    ('  maria@exemplo.com ', 'maria@exemplo.com'),
+    ('maria@exemplo.com\t', 'maria@exemplo.com'),
+    ('maria@exemplo.com\xa0', 'maria@exemplo.com'),
+    ('maria souza@exemplo.com', None),
+    ('maria@exemplo .com', None),
+    # Sintaxe
+    ('', None),
+    ('maria', None),
+    ('maria@', None),
+    ('@exemplo.com', None),
+    ('maria@@exemplo.com', None),
+    ('maria@exemplo', None),
+    ('maria@exemplo..com', None),
+    ('maria@-exemplo.com', None),
+    ('maria..souza@exemplo.com', None),
+    ('.maria@exemplo.com', None),
+    ('joão@exemplo.com', None),  # parte local acentuada exige SMTPUTF8, que o envio não usa
+    ('m' * 65 + '@exemplo.com', None),
+    (None, None),
+    (1234, None),
+])
+def test_normalize_email(email, expected):
+    assert normalize_email(email) == expected
+
+
+@pytest.mark.parametrize('first, second', [(1, '1'), ('1', '1.0'), ('1', '01'), ('1', '0001'), ('a12', 'A12')])
+def test_number_key_treats_equivalent_numbers_as_the_same(first, second):
+    assert number_key(first) == number_key(second)
+
+
+def write_rows(job, rows):
+    with open(job.data_path, 'w', newline='', encoding='utf-8') as data_file:
+        writer = csv.writer(data_file)
+        writer.writerow(['Nome', 'Email', 'Numero do Certificado'])
+        writer.writerows(rows)
+    return job
+
+
+# (linha da planilha, nome, email, número) -> motivo esperado, ou None se a linha vale
+ROWS = [
+    (('Ana', 'ana@exemplo.com', '1'), None),
+    (('', 'semnome@exemplo.com', '2'), EMPTY_NAME),
+    (('Bruno', '', '3'), EMPTY_EMAIL),
+    (('Carla', 'carla@exemplo', '4'), INVALID_EMAIL),
+    (('Davi', 'davi@exemplo.com', ''), EMPTY_NUMBER),
+    (('Eva', 'eva@exemplo.com', '0001'), DUPLICATE_NUMBER),  # igual ao 1 da primeira linha
+    (('Ana de novo', 'ANA@Exemplo.com', '7'), DUPLICATE_EMAIL),  # repetidos são comparados sem caixa
+    (('Hugo', 'hugo@exemplo.com', '8'), None),
+    (('Fabio', 'fabio@café.com.br', '9'), None),
+    (('Gil', 'gil@naorecebe.com.br', '10'), NO_MAIL_DOMAIN),
+]
+
+
+def test_rejection_reasons(make_job):
+    job = write_rows(make_job(check_domains=True), [row for row, _ in ROWS])
+    checker = DomainChecker(resolver=lambda domain: domain != 'naorecebe.com.br', canary=None)
+    report = validate_recipients(job, checker)
+    reasons = {issue.line - 2: issue.reason for issue in report.issues}  # linha 2 é a primeira após o cabeçalho
+    assert reasons == {index: reason for index, (_, reason) in enumerate(ROWS) if reason}
+    assert (report.total, report.valid) == (len(ROWS), 3)
+    assert [issue.detail for issue in report.issues if issue.reason == DUPLICATE_NUMBER] == ['igual à linha 2']
+    assert [issue.detail for issue in report.issues if issue.reason == DUPLICATE_EMAIL] == ['igual à linha 2']
+    # Os emails que mudaram na normalização são os usados no envio
+    assert report.normalized_emails == {8: 'fabio@xn--caf-dma.com.br'}
+
+
+def test_duplicate_emails_allowed_when_configured(make_job):
+    job = write_rows(make_job(allow_duplicate_emails=True),
+                     [('Ana', 'ana@exemplo.com', '1'), ('Ana', 'ana@Exemplo.com', '2'), ('Ana', 'ana@exemplo.com', '1')])
+    report = validate_recipients(job)
+    assert [(issue.line, issue.reason) for issue in report.issues] == [(4, DUPLICATE_NUMBER)]